@@ -0,0 +1,156 @@
+# File: audio_cache.py
+"""
+A disk cache of synthesized speech, so phrases the assistant says again
+and again (greetings, prompts, error messages) are played straight from
+disk instead of being synthesized by Deepgram every time.
+
+Each entry is one raw PCM file named after a hash of the text, model,
+encoding and sample rate. Reading an entry memory-maps the file, so audio
+goes from the page cache to the playback buffer without being read into
+Python objects first. Least recently used entries are deleted once the
+cache is bigger than `max_bytes`.
+"""
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+
+CACHE_DIR = ".tts_cache"
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+class AudioCache:
+    """
+    Args:
+        cache_dir (str): Folder holding the audio files.
+        max_bytes (int): Size bound of the folder; older entries are evicted past it.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text, model, encoding, sample_rate):
+        """Hashes everything that affects the synthesized audio into one key."""
+        digest = hashlib.sha256()
+        for part in (model, encoding, str(sample_rate), text.strip()):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pcm")
+
+    def contains(self, key):
+        """True if audio for key is cached (without counting a hit or miss)."""
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        """
+        Returns the cached audio as a read-only memoryview of the memory-mapped
+        file, or None on a miss. The mapping stays valid even if the entry is
+        evicted while it is being played.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # ValueError: an empty file can't be mapped
+            with self._lock:
+                self.misses += 1
+            return None
+        os.utime(path)  # Marks the entry as recently used
+        with self._lock:
+            self.hits += 1
+        return memoryview(mapped)
+
+    def recorder(self, key):
+        """
+        Returns an AudioRecorder that collects audio for key as it streams in;
+        it becomes a cache entry only when commit() is called.
+        """
+        return AudioRecorder(self, key)
+
+    def put(self, key, data):
+        """Stores complete audio for key."""
+        recording = self.recorder(key)
+        recording.write(data)
+        recording.commit()
+
+    def _commit(self, tmp_path, key):
+        if os.path.getsize(tmp_path) == 0:
+            os.remove(tmp_path)
+            return
+        # The rename is atomic, so readers never see half an entry
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and entry.name.endswith(".pcm"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+            total = sum(size for _, _, size in entries)
+            for _, path, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                total -= size
+                self.evictions += 1
+
+    def stats(self):
+        """Returns hit/miss counters and the current size of the cache."""
+        files = [e for e in os.scandir(self.cache_dir) if e.is_file() and e.name.endswith(".pcm")]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(files),
+            "bytes": sum(e.stat().st_size for e in files),
+        }
+
+
+class AudioRecorder:
+    """Audio for one cache entry, written to a temporary file as it arrives."""
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        fd, self._tmp_path = tempfile.mkstemp(dir=cache.cache_dir, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, data):
+        self._file.write(data)
+
+    def commit(self):
+        """Finishes the entry; it is served from the cache from now on."""
+        if self._file.closed:
+            return
+        self._file.close()
+        self.cache._commit(self._tmp_path, self.key)
+
+    def abort(self):
+        """Throws the audio away, e.g. when the utterance was interrupted."""
+        if self._file.closed:
+            return
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            pass
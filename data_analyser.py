@@ -1,28 +1,655 @@
 # File: data_analyzer.py
+import os
+import sys
+import glob
+import time
+import json
+import shutil
+import hashlib
+import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
+import matplotlib
+# Draw straight to image files: no GUI event loop, safe in servers and worker processes
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
-def analyze_data(csv_path="sample_data.csv", output_image="analysis_plot.png"):
-    """Reads a CSV file, calculates basic stats, and creates a plot."""
+CHUNK_ROWS = 100_000   # Rows read at a time in streaming mode
+SKETCH_K = 200         # Accuracy of the quantile sketch (rank error is roughly 1.7 / K)
+CACHE_DIR = ".csv_cache"
+CACHE_MAX_BYTES = 2 * 1024 ** 3   # Total size the columnar cache may grow to
+SAMPLE_ROWS = 10_000   # Rows read to guess compact column types
+CATEGORY_RATIO = 0.5   # Text columns with fewer distinct values than this share become categoricals
+ANALYSIS_COLUMNS = ["Year", "Rainfall_mm", "Temperature_C"]  # Columns the analysis and plot use
+MAX_BARS = 60          # Bars drawn at most; more x values are binned together
+MAX_LINE_POINTS = 2000 # Points drawn at most on a line plot; more are downsampled
+
+
+class RunningStats:
+    """
+    Count, mean, standard deviation, min and max of a column, updated one
+    chunk at a time in constant memory.
+
+    Each chunk's mean and sum of squared deviations are combined with the
+    running totals using the parallel form of Welford's algorithm (Chan et
+    al.), which stays accurate where the naive sum-of-squares formula loses
+    precision. Two RunningStats can be merged the same way.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0          # Sum of squared deviations from the mean
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        """Adds an array of values (NaNs are ignored, like describe() does)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        chunk = RunningStats()
+        chunk.count = len(values)
+        chunk.mean = float(values.mean())
+        chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+        chunk.min = float(values.min())
+        chunk.max = float(values.max())
+        self.merge(chunk)
+
+    def merge(self, other):
+        """Combines another RunningStats into this one."""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self):
+        """Sample standard deviation (ddof=1), as in describe()."""
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+
+class QuantileSketch:
+    """
+    A mergeable KLL quantile sketch.
+
+    Values are kept in levels of "compactors"; an item on level h stands for
+    2**h original values. When a level is full it is sorted and every other
+    item (from a random start) is promoted to the next level, so memory stays
+    around a few times K no matter how many values are added, while any
+    quantile is answered with a small rank error.
+    """
+
+    def __init__(self, k=SKETCH_K):
+        self.k = k
+        self.levels = [np.empty(0)]
+
+    def _capacity(self, level):
+        # Lower levels get geometrically smaller buffers
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # With an odd count, keep one item here so no weight is lost
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(keep)]
+                promoted = pairs[random.randint(0, 1)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        """Adds an array of values (NaNs are ignored)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+
+    def merge(self, other):
+        """Combines another sketch into this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def quantile(self, q):
+        """Returns the approximate q-quantile (0 <= q <= 1), or NaN if empty."""
+        values = np.concatenate(self.levels)
+        if len(values) == 0:
+            return np.nan
+        weights = np.concatenate([np.full(len(items), 2.0 ** level)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, cumulative = values[order], np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(values[min(index, len(values) - 1)])
+
+
+class StreamingSummary:
+    """
+    describe()-style statistics for the numeric columns of a table that is
+    fed in chunk by chunk. Summaries of different chunks or files can be
+    merged.
+    """
+
+    PERCENTILES = (0.25, 0.5, 0.75)
+
+    def __init__(self, k=SKETCH_K):
+        self.k = k
+        self.columns = {}   # column name -> (RunningStats, QuantileSketch)
+
+    def update(self, chunk):
+        """Adds the numeric columns of a DataFrame chunk."""
+        numeric = list(chunk.select_dtypes(include="number").columns)
+        # A column numeric in an earlier chunk stays numeric; stray text becomes NaN
+        for name in self.columns:
+            if name in chunk.columns and name not in numeric:
+                numeric.append(name)
+        for name in numeric:
+            stats, sketch = self.columns.setdefault(name, (RunningStats(), QuantileSketch(self.k)))
+            values = pd.to_numeric(chunk[name], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            stats.update(values)
+            sketch.update(values)
+
+    def merge(self, other):
+        """Combines another StreamingSummary into this one."""
+        for name, (stats, sketch) in other.columns.items():
+            if name in self.columns:
+                self.columns[name][0].merge(stats)
+                self.columns[name][1].merge(sketch)
+            else:
+                self.columns[name] = (stats, sketch)
+
+    def describe(self):
+        """Returns a DataFrame laid out like DataFrame.describe()."""
+        index = ["count", "mean", "std", "min"] + [f"{int(p * 100)}%" for p in self.PERCENTILES] + ["max"]
+        result = {}
+        for name, (stats, sketch) in self.columns.items():
+            empty = stats.count == 0
+            result[name] = [
+                float(stats.count),
+                np.nan if empty else stats.mean,
+                stats.std,
+                np.nan if empty else stats.min,
+                *[sketch.quantile(p) for p in self.PERCENTILES],
+                np.nan if empty else stats.max,
+            ]
+        return pd.DataFrame(result, index=index)
+
+
+def _scan_csv(csv_path, chunksize, x, y):
+    """Reads a CSV in chunks, returning (head, StreamingSummary, per-x sums, per-x counts)."""
+    summary = StreamingSummary()
+    head = None
+    sums, counts = None, None
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        if head is None or len(head) < 5:
+            head = chunk.head() if head is None else pd.concat([head, chunk]).head()
+        summary.update(chunk)
+        if x in chunk.columns and y in chunk.columns:
+            # Keep only one running total per x value for the plot
+            grouped = chunk.groupby(x)[y].agg(["sum", "count"])
+            sums = grouped["sum"] if sums is None else sums.add(grouped["sum"], fill_value=0)
+            counts = grouped["count"] if counts is None else counts.add(grouped["count"], fill_value=0)
+    return head, summary, sums, counts
+
+
+def streaming_describe(csv_path, chunksize=CHUNK_ROWS, x="Year", y="Rainfall_mm"):
+    """
+    Reads a CSV file in chunks and computes describe()-style statistics with
+    bounded memory, so files larger than RAM can be analysed.
+
+    Args:
+        csv_path (str): Path to the CSV file.
+        chunksize (int): Rows read at a time.
+        x (str): Column to group the plot by.
+        y (str): Column whose per-x mean is plotted.
+
+    Returns:
+        tuple: (first rows DataFrame, StreamingSummary, per-x mean of y as a
+        Series, or None if the file lacks either column).
+    """
+    head, summary, sums, counts = _scan_csv(csv_path, chunksize, x, y)
+    means = None if sums is None else (sums / counts).sort_index()
+    return head, summary, means
+
+
+# --- Columnar binary cache ---
+
+def _cache_entry_name(csv_path):
+    """Names a cache entry after the file's path, size and modification time."""
+    stat = os.stat(csv_path)
+    path_key = hashlib.sha256(os.path.abspath(csv_path).encode("utf-8")).hexdigest()[:16]
+    version_key = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8")).hexdigest()[:16]
+    return path_key, f"{path_key}-{version_key}"
+
+
+def _dir_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def _write_cache_entry(df, entry_dir):
+    """
+    Stores each column of a DataFrame as its own .npy file. Text columns are
+    stored as integer category codes, with the category values in meta.json.
+    """
+    os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+    # Write into a temporary folder and rename it, so readers never see half an entry
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(entry_dir))
+    meta = {"columns": []}
+    for i, name in enumerate(df.columns):
+        column = df[name]
+        info = {"name": str(name), "file": f"{i}.npy"}
+        if column.dtype.kind in "biuf":
+            values = column.to_numpy()
+        else:
+            categorical = column.astype("category")
+            values = categorical.cat.codes.to_numpy()
+            info["categories"] = [str(c) for c in categorical.cat.categories]
+        np.save(os.path.join(tmp_dir, info["file"]), values, allow_pickle=False)
+        meta["columns"].append(info)
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
     try:
-        # Read the data from the CSV file using pandas
-        df = pd.read_csv(csv_path)
-        
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # Another process wrote the same entry first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _read_cache_entry(entry_dir, columns=None):
+    """Loads the requested columns of a cache entry, memory-mapping the arrays."""
+    meta_path = os.path.join(entry_dir, "meta.json")
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    os.utime(meta_path)  # Marks the entry as recently used
+    available = {info["name"]: info for info in meta["columns"]}
+    names = list(available) if columns is None else list(columns)
+    missing = [name for name in names if name not in available]
+    if missing:
+        raise KeyError(", ".join(repr(name) for name in missing))
+
+    data = {}
+    for name in names:
+        info = available[name]
+        # mmap_mode="r" maps the file instead of reading it: no parse and no copy
+        values = np.load(os.path.join(entry_dir, info["file"]), mmap_mode="r", allow_pickle=False)
+        if "categories" in info:
+            data[name] = pd.Categorical.from_codes(values, categories=info["categories"])
+        else:
+            data[name] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def _evict_cache(cache_dir, max_bytes, keep):
+    """Deletes least recently used entries until the cache fits in max_bytes."""
+    entries = []
+    for entry in os.scandir(cache_dir):
+        meta_path = os.path.join(entry.path, "meta.json")
+        if entry.is_dir() and os.path.exists(meta_path):
+            entries.append((os.stat(meta_path).st_mtime, entry.path, _dir_size(entry.path)))
+    total = sum(size for _, _, size in entries)
+    for _, path, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        if os.path.basename(path) != keep:
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+def load_csv_cached(csv_path, columns=None, cache_dir=CACHE_DIR, max_cache_bytes=CACHE_MAX_BYTES):
+    """
+    Loads a CSV file through a columnar binary cache.
+
+    The first read parses the CSV and saves every column as a .npy array.
+    Later reads of the unchanged file memory-map only the requested columns
+    instead of parsing text. A cache entry is tied to the file's path, size
+    and modification time, so editing the file makes a fresh entry and the
+    old one is deleted.
+
+    Args:
+        csv_path (str): Path to the CSV file.
+        columns (list, optional): Columns to load (default: all).
+        cache_dir (str): Folder holding the cache.
+        max_cache_bytes (int): Least recently used entries are deleted beyond this size.
+
+    Returns:
+        DataFrame: The requested columns.
+    """
+    path_key, entry_name = _cache_entry_name(csv_path)
+    entry_dir = os.path.join(cache_dir, entry_name)
+
+    if not os.path.isdir(entry_dir):
+        # Drop entries for older versions of this file
+        if os.path.isdir(cache_dir):
+            for entry in os.scandir(cache_dir):
+                if entry.name.startswith(path_key + "-"):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+        _write_cache_entry(pd.read_csv(csv_path), entry_dir)
+        _evict_cache(cache_dir, max_cache_bytes, keep=entry_name)
+
+    return _read_cache_entry(entry_dir, columns)
+
+
+# --- Compact dtypes and column projection ---
+
+def _present_columns(csv_path, wanted):
+    """The wanted columns the file actually has, so optional ones can be absent."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    return [name for name in wanted if name in header]
+
+
+def infer_compact_dtypes(csv_path, columns=None, sample_rows=SAMPLE_ROWS):
+    """
+    Guesses the smallest safe type for each column from the first rows.
+
+    Returns:
+        tuple: (dict of column name -> "integer", "float32", "category" or
+        None for "leave as is", sample DataFrame read with default types).
+    """
+    sample = pd.read_csv(csv_path, usecols=columns, nrows=sample_rows)
+    kinds = {}
+    for name in sample.columns:
+        column = sample[name]
+        if column.dtype.kind in "iu":
+            kinds[name] = "integer"
+        elif column.dtype.kind == "f":
+            kinds[name] = "float32"
+        elif column.dtype.kind == "O" or isinstance(column.dtype, pd.StringDtype):
+            if column.nunique() < CATEGORY_RATIO * max(len(column), 1):
+                kinds[name] = "category"
+            else:
+                kinds[name] = None
+        else:
+            kinds[name] = None
+    return kinds, sample
+
+
+def read_csv_compact(csv_path, columns=None, sample_rows=SAMPLE_ROWS, chunksize=CHUNK_ROWS):
+    """
+    Reads only the given columns of a CSV file, using the narrowest types
+    that hold the data: small integer types, float32 for measurements and
+    categoricals for repetitive text.
+
+    The types are guessed from a sample, but numbers are only narrowed per
+    chunk after parsing, because the sample may not contain the largest
+    values (read_csv would silently wrap them) or a stray text cell (a
+    numeric dtype would make read_csv fail). A chunk that can't be narrowed
+    keeps its columns as read_csv loaded them.
+
+    Args:
+        csv_path (str): Path to the CSV file.
+        columns (list, optional): Columns to load (default: all).
+        sample_rows (int): Rows used to guess the types.
+        chunksize (int): Rows parsed at a time.
+
+    Returns:
+        tuple: (DataFrame, dict with "loaded_bytes" and "default_bytes", the
+        estimated size of the whole file loaded with default types).
+    """
+    kinds, sample = infer_compact_dtypes(csv_path, columns, sample_rows)
+    read_dtypes = {name: kind for name, kind in kinds.items() if kind == "category"}
+    downcasts = {"integer": "integer", "float32": "float"}
+
+    parts = []
+    for chunk in pd.read_csv(csv_path, usecols=columns, dtype=read_dtypes, chunksize=chunksize):
+        for name, kind in kinds.items():
+            if kind in downcasts:
+                try:
+                    chunk[name] = pd.to_numeric(chunk[name], downcast=downcasts[kind])
+                except ValueError:
+                    pass  # A stray text cell: keep the column as read_csv loaded it
+        parts.append(chunk)
+    if not parts:
+        return sample, {"loaded_bytes": 0, "default_bytes": 0}
+
+    data = {}
+    for name in parts[0].columns:
+        if kinds.get(name) == "category":
+            # Chunks found different categories; union_categoricals merges them
+            data[name] = pd.api.types.union_categoricals([part[name] for part in parts])
+        else:
+            # The widest type any chunk needed is used for the whole column
+            dtype = np.result_type(*[part[name].dtype for part in parts]) \
+                if all(isinstance(part[name].dtype, np.dtype) for part in parts) else None
+            data[name] = np.concatenate([part[name].to_numpy(dtype=dtype) for part in parts])
+    df = pd.DataFrame(data, copy=False)
+
+    # What the whole file would have taken with read_csv's default types
+    full_sample = pd.read_csv(csv_path, nrows=sample_rows)
+    bytes_per_row = full_sample.memory_usage(deep=True, index=False).sum() / max(len(full_sample), 1)
+    report = {
+        "loaded_bytes": int(df.memory_usage(deep=True, index=False).sum()),
+        "default_bytes": int(bytes_per_row * len(df)),
+    }
+    return df, report
+
+
+# --- Plotting ---
+
+def aggregate_for_bars(x, y, max_bars=MAX_BARS, weights=None):
+    """
+    Reduces any number of (x, y) rows to at most `max_bars` bars of mean y.
+
+    Integer x values that span no more than `max_bars` values (e.g. years)
+    get one bar each. Otherwise numeric or datetime x values are grouped
+    into `max_bars` equal-width bins, labelled by where each bin starts.
+    Both are single passes with np.bincount, so millions of rows are cheap.
+
+    Args:
+        x (array-like): Bar positions (e.g. years or timestamps).
+        y (array-like): Values to plot.
+        max_bars (int): Most bars to return.
+        weights (array-like, optional): How many rows each y stands for, when
+            y is already a mean (e.g. per-x means from streamed chunks), so
+            bins average the underlying rows rather than the means.
+
+    Returns:
+        Series: Mean y indexed by x value or bin start, sorted by x.
+    """
+    x, y = np.asarray(x), np.asarray(y, dtype=np.float64)
+    w = np.ones(len(y)) if weights is None else np.asarray(weights, dtype=np.float64)
+    is_datetime = np.issubdtype(x.dtype, np.datetime64)
+    if not (is_datetime or np.issubdtype(x.dtype, np.number)):
+        # Text labels have no order to bin by; average per label instead
+        keep = ~np.isnan(y)
+        grouped = pd.DataFrame({"sum": y[keep] * w[keep], "count": w[keep]},
+                               index=pd.Index(x[keep])).groupby(level=0, observed=True).sum()
+        return (grouped["sum"] / grouped["count"]).iloc[:max_bars]
+
+    if is_datetime:
+        valid = ~np.isnan(y) & ~np.isnat(x)
+    elif np.issubdtype(x.dtype, np.floating):
+        valid = ~np.isnan(y) & ~np.isnan(x)
+    else:
+        valid = ~np.isnan(y)
+    if not valid.all():
+        x, y, w = x[valid], y[valid], w[valid]
+    if len(x) == 0:
+        return pd.Series(dtype=np.float64)
+    # Bin on the integer representation, which also covers datetimes
+    positions = x.view(np.int64) if is_datetime else x
+    low, high = positions.min(), positions.max()
+
+    if np.issubdtype(positions.dtype, np.integer) and high - low < max_bars:
+        bins = (positions - low).astype(np.int64)
+        starts = low + np.arange(high - low + 1)
+    else:
+        width = (float(high) - float(low)) / max_bars or 1.0
+        bins = np.minimum(((positions - low) / width).astype(np.int64), max_bars - 1)
+        starts = low + width * np.arange(max_bars)
+    sums = np.bincount(bins, weights=y * w, minlength=len(starts))
+    counts = np.bincount(bins, weights=w, minlength=len(starts))
+    used = counts > 0
+
+    starts = starts[used]
+    if is_datetime:
+        labels = starts.astype(np.int64).view(x.dtype)
+    elif np.issubdtype(x.dtype, np.integer):
+        labels = starts.astype(np.int64)
+    else:
+        labels = np.round(starts, 2)
+    return pd.Series(sums[used] / counts[used], index=labels)
+
+
+def lttb_downsample(x, y, max_points=MAX_LINE_POINTS):
+    """
+    Downsamples a line to `max_points` points with Largest-Triangle-Three-
+    Buckets, which keeps the visual shape (peaks and dips) of the series.
+
+    Args:
+        x (array-like): Sorted x values (numbers or datetimes).
+        y (array-like): y values.
+        max_points (int): Points to keep (at least 3).
+
+    Returns:
+        tuple: (x, y) arrays of the kept points.
+    """
+    x, y = np.asarray(x), np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n <= max_points or max_points < 3:
+        return x, y
+    xs = x.astype(np.int64).astype(np.float64) if np.issubdtype(x.dtype, np.datetime64) \
+        else x.astype(np.float64)
+
+    # The first and last points are always kept; the rest is split into buckets
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third triangle corner
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x, next_y = xs[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs((xs[previous] - next_x) * (y[start:end] - y[previous])
+                       - (xs[previous] - xs[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        keep[i + 1] = previous
+    return x[keep], y[keep]
+
+
+def plot_series(x, y, output_image, kind="bar", title=None, xlabel=None, ylabel=None,
+                max_bars=MAX_BARS, max_points=MAX_LINE_POINTS, weights=None):
+    """
+    Plots y against x to an image file, shrinking large inputs first so the
+    drawing time does not depend on the number of rows.
+
+    Bars are averaged per x value and binned to at most `max_bars`; lines are
+    downsampled with LTTB to at most `max_points`. The figure is closed after
+    saving so long-running processes do not leak memory.
+
+    Args:
+        x (array-like): x values.
+        y (array-like): y values.
+        output_image (str): File to save the plot to.
+        kind (str): "bar" or "line".
+        title, xlabel, ylabel (str, optional): Plot labels.
+        max_bars (int): Most bars drawn.
+        max_points (int): Most line points drawn.
+        weights (array-like, optional): Rows behind each y, for bars of
+            pre-averaged values; see aggregate_for_bars.
+    """
+    fig, ax = plt.subplots(figsize=(10, 6))
+    try:
+        if kind == "bar":
+            bars = aggregate_for_bars(x, y, max_bars, weights)
+            positions = np.arange(len(bars))
+            ax.bar(positions, bars.to_numpy(), label=ylabel)
+            ax.set_xticks(positions)
+            ax.set_xticklabels([str(label) for label in bars.index], rotation=90)
+        elif kind == "line":
+            order = np.argsort(np.asarray(x), kind="stable")
+            line_x, line_y = lttb_downsample(np.asarray(x)[order], np.asarray(y)[order], max_points)
+            ax.plot(line_x, line_y, label=ylabel)
+        else:
+            raise ValueError(f"Unsupported plot kind: {kind}")
+        ax.set_title(title or "")
+        ax.set_xlabel(xlabel or "")
+        if ylabel:
+            ax.legend()
+        fig.tight_layout()
+        fig.savefig(output_image)
+    finally:
+        plt.close(fig)
+
+
+def analyze_data(csv_path="sample_data.csv", output_image="analysis_plot.png", streaming=False,
+                 chunksize=CHUNK_ROWS, use_cache=False, compact=False):
+    """
+    Reads a CSV file, calculates basic stats, and creates a plot.
+
+    With streaming=True the file is read in chunks of `chunksize` rows, so it
+    never has to fit in memory; quantiles are then approximate. With
+    use_cache=True the parsed file is kept in a binary cache, so repeat runs
+    on the same file skip CSV parsing. With compact=True only the columns in
+    ANALYSIS_COLUMNS are loaded, in the narrowest types that hold them.
+    """
+    try:
+        if streaming:
+            head, summary, sums, counts = _scan_csv(csv_path, chunksize, 'Year', 'Rainfall_mm')
+            if sums is None:
+                raise KeyError("'Year' or 'Rainfall_mm'")
+            means = (sums / counts).sort_index()
+            counts = counts.reindex(means.index)
+            stats = summary.describe()
+        else:
+            # Read the data from the CSV file using pandas
+            columns = _present_columns(csv_path, ANALYSIS_COLUMNS) if compact else None
+            if use_cache:
+                df = load_csv_cached(csv_path, columns)
+            elif compact:
+                df, report = read_csv_compact(csv_path, columns, chunksize=chunksize)
+                saved = report["default_bytes"] - report["loaded_bytes"]
+                print(f"Loaded {report['loaded_bytes'] / 1024:.1f} KB instead of about "
+                      f"{report['default_bytes'] / 1024:.1f} KB ({saved / 1024:.1f} KB saved).")
+            else:
+                df = pd.read_csv(csv_path)
+            head = df.head()
+            # describe() gives stats like mean, min, max, etc.
+            stats = df.describe()
+
         print("--- Data Analysis ---")
         print("First 5 rows of the data:")
-        print(df.head())
-        
+        print(head)
+
         print("\nBasic Statistics:")
-        # describe() gives stats like mean, min, max, etc.
-        print(df.describe())
+        print(stats)
 
         # Create a simple plot
         # This example assumes the CSV has 'Year' and 'Rainfall_mm' columns
-        df.plot(kind='bar', x='Year', y='Rainfall_mm', title='Annual Rainfall Analysis')
-        
+        # Large inputs are averaged into at most MAX_BARS bars before drawing
+        if streaming:
+            # Per-year means, weighted by their row counts when years are binned
+            x, y, weights = means.index, means.to_numpy(), counts.to_numpy()
+        else:
+            x, y, weights = df['Year'], df['Rainfall_mm'], None
+
         # Save the plot to an image file
-        plt.savefig(output_image)
-        
+        plot_series(x, y, output_image, kind='bar', title='Annual Rainfall Analysis',
+                    xlabel='Year', ylabel='Rainfall_mm', weights=weights)
+
         print(f"\nAnalysis complete. Plot saved to '{output_image}'")
 
     except FileNotFoundError:
@@ -32,5 +659,105 @@ def analyze_data(csv_path="sample_data.csv", output_image="analysis_plot.png"):
     except Exception as e:
         print(f"An error occurred: {e}")
 
+# --- Many files in parallel ---
+
+def _analyze_file_partial(csv_path, chunksize, x, y):
+    """
+    Worker for analyze_files: scans one file into mergeable partial results.
+    Runs in a pool process, so it returns plain picklable objects.
+    """
+    start = time.perf_counter()
+    try:
+        _, summary, sums, counts = _scan_csv(csv_path, chunksize, x, y)
+        return csv_path, summary, sums, counts, time.perf_counter() - start, None
+    except Exception as e:
+        return csv_path, None, None, None, time.perf_counter() - start, str(e)
+
+
+def analyze_files(sources, output_image="analysis_plot.png", max_workers=None, chunksize=CHUNK_ROWS,
+                  x="Year", y="Rainfall_mm"):
+    """
+    Analyses many CSV files at once on a pool of processes and combines
+    them into one summary and one plot.
+
+    Each worker streams its files into mergeable statistics (see
+    StreamingSummary) and per-x totals for the plot; the parent merges
+    them. Python, pandas and matplotlib start once per worker instead of
+    once per file.
+
+    Args:
+        sources (str or list): A glob pattern such as "daily/*.csv", or a list
+            of paths and patterns.
+        output_image (str): File to save the combined plot to.
+        max_workers (int, optional): Worker processes (default: CPU count).
+        chunksize (int): Rows each worker reads at a time.
+        x (str): Column to group the plot by.
+        y (str): Column whose per-x mean is plotted.
+
+    Returns:
+        DataFrame: The combined describe()-style statistics, or None if no
+        file could be read.
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        matches = sorted(glob.glob(source))
+        paths.extend(matches if matches else [source])
+    if not paths:
+        print("Error: No CSV files to analyse.")
+        return None
+
+    print(f"--- Analysing {len(paths)} files ---")
+    summary = StreamingSummary()
+    sums, counts = None, None
+    timings = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_analyze_file_partial, path, chunksize, x, y) for path in paths]
+        for future in as_completed(futures):
+            path, partial, part_sums, part_counts, elapsed, error = future.result()
+            timings.append((path, elapsed))
+            if error:
+                print(f"Error in '{path}': {error}")
+                continue
+            summary.merge(partial)
+            if part_sums is not None:
+                sums = part_sums if sums is None else sums.add(part_sums, fill_value=0)
+                counts = part_counts if counts is None else counts.add(part_counts, fill_value=0)
+    total = time.perf_counter() - start
+
+    print("\nPer-file timings:")
+    for path, elapsed in sorted(timings):
+        print(f"  {elapsed:8.3f}s  {path}")
+    print(f"Total: {total:.3f}s wall clock, {sum(e for _, e in timings):.3f}s of work")
+
+    if not summary.columns:
+        print("Error: None of the files could be read.")
+        return None
+    stats = summary.describe()
+    print("\nCombined Statistics:")
+    print(stats)
+
+    if sums is not None:
+        means = (sums / counts).sort_index()
+        plot_series(means.index, means.to_numpy(), output_image, kind='bar',
+                    title='Annual Rainfall Analysis', xlabel=x, ylabel=y,
+                    weights=counts.reindex(means.index).to_numpy())
+        print(f"\nAnalysis complete. Plot saved to '{output_image}'")
+    return stats
+
+
 if __name__ == "__main__":
-    analyze_data()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        # python data_analyser.py "daily/*.csv" ... analyses all files together
+        analyze_files(sys.argv[1:])
+        sys.exit()
+
+    analyze_data()
+    # For files larger than memory, read them in chunks instead:
+    # analyze_data("big_export.csv", streaming=True)
+    # For files analysed again and again, skip re-parsing them:
+    # analyze_data("sample_data.csv", use_cache=True)
+    # To load only the analysed columns with the smallest types:
+    # analyze_data("wide_export.csv", compact=True)
@@ -1,40 +1,176 @@
 # File: gemini_chat.py
 
 import os
+import threading
 import google.generativeai as genai
 from dotenv import load_dotenv
+from single_flight import flights, make_key
+from response_cache import make_key as response_key
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Get Google API Key from .env file
 API_KEY = os.getenv("GOOGLE_API_KEY")
+MODEL_NAME = "gemini-pro"
 
-def get_gemini_response(prompt):
-    """Sends a prompt to the Gemini AI and returns the response."""
+
+class GeminiChatClient:
+    """
+    A long-lived Gemini client. The API key is configured and the model is
+    built once, so every prompt after the first reuses the same model object
+    and its underlying connection instead of paying the setup cost again.
+    """
+
+    def __init__(self, api_key=API_KEY, model_name=MODEL_NAME):
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY not found in .env file.")
+        self.model_name = model_name
+        # Configure the API key and create the model only once
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def warm_up(self):
+        """
+        Opens the connection to the API ahead of the first real prompt.
+        count_tokens is a cheap round-trip that does not generate any text.
+
+        Returns:
+            bool: True if the warm-up request succeeded, False otherwise.
+        """
+        try:
+            self.model.count_tokens("ping")
+            return True
+        except Exception as e:
+            print(f"Gemini warm-up failed: {e}")
+            return False
+
+    def generate(self, prompt):
+        """Sends a prompt and returns the full response text."""
+        response = self.model.generate_content(prompt)
+        return response.text
+
+    def stream(self, prompt):
+        """
+        Sends a prompt and yields the response text piece by piece as it
+        arrives, so callers can show the first words without waiting for
+        the whole answer.
+
+        Args:
+            prompt (str): The prompt to send.
+
+        Yields:
+            str: The next piece (delta) of the response text.
+        """
+        response = self.model.generate_content(prompt, stream=True)
+        for chunk in response:
+            # Some chunks (e.g. safety metadata) carry no text
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            if text:
+                yield text
+
+
+# Shared client, created on first use and reused for every later prompt
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Returns the shared GeminiChatClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GeminiChatClient()
+    return _client
+
+
+def _ask_gemini(prompt):
+    """Returns (text, ok): ok is False when text is an error message."""
     if not API_KEY:
-        return "Error: GOOGLE_API_KEY not found in .env file."
-    
+        return "Error: GOOGLE_API_KEY not found in .env file.", False
+
     try:
-        # Configure the API key
-        genai.configure(api_key=API_KEY)
-        
-        # Create the model
-        model = genai.GenerativeModel('gemini-pro')
-        
-        # Get the response
-        response = model.generate_content(prompt)
-        return response.text
-        
+        return get_client().generate(prompt), True
+
     except Exception as e:
-        return f"An error occurred: {e}"
+        return f"An error occurred: {e}", False
+
+
+def _cache_answer(response_cache, prompt, answer):
+    # Every caller sharing a call fills its own cache; error messages are never cached
+    text, ok = answer
+    if ok and response_cache is not None:
+        response_cache.put(response_key("gemini", MODEL_NAME, [prompt]), text)
+    return text
+
+
+def get_gemini_response(prompt, response_cache=None):
+    """
+    Sends a prompt to the Gemini AI and returns the response.
+
+    Identical prompts asked at the same time (e.g. from several threads)
+    share one API call.
+
+    Args:
+        prompt (str): The prompt to send.
+        response_cache (ResponseCache, optional): Answer repeat prompts from
+            earlier responses without calling the API.
+    """
+    if response_cache is not None:
+        cached = response_cache.get(response_key("gemini", MODEL_NAME, [prompt]))
+        if cached is not None:
+            return cached
+    answer = flights.do(make_key("gemini", MODEL_NAME, prompt), _ask_gemini, prompt)
+    return _cache_answer(response_cache, prompt, answer)
+
+
+async def get_gemini_response_async(prompt, response_cache=None):
+    """The asyncio version of get_gemini_response."""
+    if response_cache is not None:
+        cached = response_cache.get(response_key("gemini", MODEL_NAME, [prompt]))
+        if cached is not None:
+            return cached
+    answer = await flights.do_async(make_key("gemini", MODEL_NAME, prompt), _ask_gemini, prompt)
+    return _cache_answer(response_cache, prompt, answer)
+
+
+def stream_gemini_response(prompt):
+    """
+    Sends a prompt to the Gemini AI and yields the response as it streams in.
+
+    Args:
+        prompt (str): The prompt to send.
+
+    Yields:
+        str: Pieces of the response text, or a single error message.
+    """
+    if not API_KEY:
+        yield "Error: GOOGLE_API_KEY not found in .env file."
+        return
+
+    try:
+        yield from get_client().stream(prompt)
+
+    except Exception as e:
+        yield f"An error occurred: {e}"
+
 
 if __name__ == "__main__":
     print("--- Gemini AI Chat Interface ---")
     print("Type 'quit' to exit.")
+    if API_KEY:
+        # Set up the client and connection before the user types anything
+        get_client().warm_up()
     while True:
         user_prompt = input("\nYou: ")
         if user_prompt.lower() == 'quit':
             break
-        ai_response = get_gemini_response(user_prompt)
-        print(f"Gemini AI: {ai_response}")
\ No newline at end of file
+        # Print each piece of the answer as soon as it arrives
+        print("Gemini AI: ", end="", flush=True)
+        for text in stream_gemini_response(user_prompt):
+            print(text, end="", flush=True)
+        print()
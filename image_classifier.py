@@ -1,17 +1,257 @@
 # File: gemini_vision.py
 import os
+import io
+import glob
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import google.generativeai as genai
 from dotenv import load_dotenv
-from PIL import Image
+from PIL import Image, ImageOps
+from response_cache import make_key as response_key
 
-def analyze_image(image_path, prompt):
+MODEL_NAME = 'gemini-2.5-flash'
+MAX_EDGE = 1024      # Longest side (in pixels) of an image before upload
+JPEG_QUALITY = 85    # JPEG quality used when re-encoding an image for upload
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".tif", ".tiff"}
+CACHE_PATH = ".image_cache.sqlite3"
+CACHE_MAX_ENTRIES = 50000
+
+# Shared vision model, configured once and reused by every request
+_vision_model = None
+_vision_model_lock = threading.Lock()
+
+
+def _get_vision_model():
+    """Returns the shared Gemini vision model, configuring the API key on first use."""
+    global _vision_model
+    if _vision_model is None:
+        with _vision_model_lock:
+            if _vision_model is None:
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+                _vision_model = genai.GenerativeModel(MODEL_NAME)
+    return _vision_model
+
+
+def prepare_image(image_path, max_edge=MAX_EDGE, quality=JPEG_QUALITY):
+    """
+    Decodes an image, shrinks it so its longest side is at most `max_edge`
+    and re-encodes it as JPEG, ready for upload.
+
+    Args:
+        image_path (str): The path to the image file.
+        max_edge (int): Longest side of the result in pixels (None keeps the size).
+        quality (int): JPEG quality of the result (1-95).
+
+    Returns:
+        dict: An inline image part {"mime_type", "data"} for generate_content.
+    """
+    with Image.open(image_path) as img:
+        upright = img.getexif().get(0x0112, 1) == 1  # EXIF orientation tag
+        if img.format == "JPEG" and upright and (not max_edge or max(img.size) <= max_edge):
+            # Already small enough: re-encoding would only cost time and quality
+            with open(image_path, "rb") as f:
+                return {"mime_type": "image/jpeg", "data": f.read()}
+        if max_edge:
+            # For JPEGs, let the decoder skip detail we are going to throw away
+            img.draft("RGB", (max_edge, max_edge))
+        img = ImageOps.exif_transpose(img)
+        if max_edge:
+            img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return {"mime_type": "image/jpeg", "data": buffer.getvalue()}
+
+
+# --- Perceptual-hash result cache ---
+
+def image_hash(image_path):
+    """
+    Computes a 64-bit perceptual "difference hash" (dHash) of an image.
+    Identical images get the same hash, and near-duplicates (re-encoded,
+    resized, slightly edited) differ in only a few bits.
+
+    Args:
+        image_path (str): The path to the image file.
+
+    Returns:
+        int: The hash as an unsigned 64-bit integer.
+    """
+    with Image.open(image_path) as img:
+        img.draft("L", (64, 64))
+        img = ImageOps.exif_transpose(img).convert("L").resize((9, 8), Image.LANCZOS)
+        pixels = list(img.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            # One bit per pixel: is it brighter than its right-hand neighbour?
+            left, right = pixels[row * 9 + col], pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+class ImageResultCache:
+    """
+    A persistent cache of vision responses keyed by (perceptual hash, prompt,
+    model), stored in SQLite.
+
+    A lookup also matches cached images whose hash is within `max_distance`
+    differing bits. To find those without comparing against every entry,
+    each hash is split into max_distance + 1 bands and indexed per band:
+    two hashes that differ in at most max_distance bits must agree exactly
+    on at least one band, so only entries sharing a band are checked.
+
+    Entries expire after `ttl` seconds (if set), and the least recently used
+    entries are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_distance=4, max_entries=CACHE_MAX_ENTRIES, ttl=None):
+        if not 0 <= max_distance < 16:
+            raise ValueError("max_distance must be between 0 and 15")
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bands = max_distance + 1
+        self._band_bits = 64 // self._bands
+        self._index = {}    # (prompt, model, band number, band value) -> set of entry ids
+        self._entries = {}  # entry id -> (hash, prompt, model)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " id INTEGER PRIMARY KEY, phash TEXT NOT NULL, prompt TEXT NOT NULL, model TEXT NOT NULL,"
+            " response TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self._db.commit()
+        # Rebuild the in-memory band index from the stored entries
+        for entry_id, phash, prompt, model in self._db.execute(
+                "SELECT id, phash, prompt, model FROM results"):
+            self._add_to_index(entry_id, int(phash, 16), prompt, model)
+
+    def _band_keys(self, phash, prompt, model):
+        mask = (1 << self._band_bits) - 1
+        for band in range(self._bands):
+            # The last band also takes the bits left over by the division
+            if band == self._bands - 1:
+                value = phash >> (band * self._band_bits)
+            else:
+                value = (phash >> (band * self._band_bits)) & mask
+            yield (prompt, model, band, value)
+
+    def _add_to_index(self, entry_id, phash, prompt, model):
+        self._entries[entry_id] = (phash, prompt, model)
+        for key in self._band_keys(phash, prompt, model):
+            self._index.setdefault(key, set()).add(entry_id)
+
+    def _remove(self, entry_ids):
+        for entry_id in entry_ids:
+            phash, prompt, model = self._entries.pop(entry_id)
+            for key in self._band_keys(phash, prompt, model):
+                ids = self._index.get(key)
+                if ids is not None:
+                    ids.discard(entry_id)
+                    if not ids:
+                        del self._index[key]
+        self._db.executemany("DELETE FROM results WHERE id = ?", [(i,) for i in entry_ids])
+
+    def get(self, phash, prompt, model=MODEL_NAME):
+        """
+        Returns the cached response for the closest matching image, or None.
+
+        Args:
+            phash (int): Perceptual hash of the image (see image_hash).
+            prompt (str): The prompt the response must have been made for.
+            model (str): The model the response must have come from.
+        """
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(phash, prompt, model):
+                candidates |= self._index.get(key, set())
+            best_id, best_distance = None, self.max_distance + 1
+            for entry_id in candidates:
+                distance = bin(self._entries[entry_id][0] ^ phash).count("1")
+                if distance < best_distance:
+                    best_id, best_distance = entry_id, distance
+
+            now = time.time()
+            row = None
+            if best_id is not None:
+                row = self._db.execute("SELECT response, created FROM results WHERE id = ?",
+                                       (best_id,)).fetchone()
+                if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                    self._remove([best_id])
+                    self._db.commit()
+                    row = None
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._db.execute("UPDATE results SET last_used = ? WHERE id = ?", (now, best_id))
+            self._db.commit()
+            return row[0]
+
+    def put(self, phash, prompt, response, model=MODEL_NAME):
+        """Stores a response, evicting expired and least recently used entries."""
+        with self._lock:
+            now = time.time()
+            cursor = self._db.execute(
+                "INSERT INTO results (phash, prompt, model, response, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)", (f"{phash:016x}", prompt, model, response, now, now))
+            self._add_to_index(cursor.lastrowid, phash, prompt, model)
+
+            stale = []
+            if self.ttl is not None:
+                stale = [r[0] for r in self._db.execute(
+                    "SELECT id FROM results WHERE created < ?", (now - self.ttl,))]
+            overflow = len(self._entries) - len(stale) - self.max_entries
+            if overflow > 0:
+                stale += [r[0] for r in self._db.execute(
+                    "SELECT id FROM results WHERE created >= ? ORDER BY last_used LIMIT ?",
+                    (now - self.ttl if self.ttl is not None else 0, overflow))]
+            if stale:
+                self._remove(stale)
+                self.evictions += len(stale)
+            self._db.commit()
+
+    def stats(self):
+        """Returns hit/miss counters and the current number of entries."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+    def close(self):
+        self._db.close()
+
+
+def analyze_image(image_path, prompt, max_edge=MAX_EDGE, quality=JPEG_QUALITY, cache=None,
+                  response_cache=None):
     """
     Sends an image and a text prompt to the Gemini Pro Vision model.
-    
+
     Args:
         image_path (str): The path to the image file.
         prompt (str): The question you want to ask about the image.
-        
+        max_edge (int): Longest side in pixels the image is shrunk to before upload.
+        quality (int): JPEG quality used for the uploaded image.
+        cache (ImageResultCache, optional): Answer duplicate and near-duplicate
+            images from earlier responses without calling the API.
+        response_cache (ResponseCache, optional): Answer byte-for-byte repeats
+            of an image and prompt from earlier responses, without decoding
+            the image at all.
+
     Returns:
         str: The AI's text response.
     """
@@ -19,20 +259,34 @@ def analyze_image(image_path, prompt):
     API_KEY = os.getenv("GOOGLE_API_KEY")
     if not API_KEY:
         return "Error: GOOGLE_API_KEY not found in .env file."
-    
+
     try:
-        # Configure the API key and load the vision model
-        genai.configure(api_key=API_KEY)
-        vision_model = genai.GenerativeModel('gemini-2.5-flash')
-        
+        if response_cache is not None:
+            with open(image_path, "rb") as f:
+                key = response_key("image", MODEL_NAME, [prompt, f.read()],
+                                   {"max_edge": max_edge, "quality": quality})
+            cached = response_cache.get(key)
+            if cached is not None:
+                return cached
+
+        if cache is not None:
+            phash = image_hash(image_path)
+            cached = cache.get(phash, prompt)
+            if cached is not None:
+                return cached
+
         print("Analyzing image with Gemini Vision...")
-        
-        # Open the image file
-        img = Image.open(image_path)
-        
+
+        # Open the image file and shrink it to what the model needs
+        img = prepare_image(image_path, max_edge, quality)
+
         # Send the image and prompt to the model
-        response = vision_model.generate_content([prompt, img])
-        
+        response = _get_vision_model().generate_content([prompt, img])
+
+        if cache is not None:
+            cache.put(phash, prompt, response.text)
+        if response_cache is not None:
+            response_cache.put(key, response.text)
         return response.text
 
     except FileNotFoundError:
@@ -40,19 +294,144 @@ def analyze_image(image_path, prompt):
     except Exception as e:
         return f"An error occurred: {e}"
 
+
+# --- Bulk classification ---
+
+def find_images(source):
+    """
+    Lists the image files in a directory, or matching a glob pattern.
+
+    Args:
+        source (str): A directory (searched recursively) or a glob pattern
+            such as "photos/*.jpg".
+
+    Returns:
+        list: Sorted image file paths.
+    """
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "**", "*")
+    else:
+        pattern = source
+    return sorted(
+        path for path in glob.glob(pattern, recursive=True)
+        if os.path.isfile(path) and os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+    )
+
+
+def _classify_prepared(part, prompt, cache=None, phash=None):
+    response = _get_vision_model().generate_content([prompt, part])
+    if cache is not None:
+        cache.put(phash, prompt, response.text)
+    return response.text
+
+
+def classify_images(source, prompt, output_jsonl="classifications.jsonl", max_edge=MAX_EDGE,
+                    quality=JPEG_QUALITY, decode_workers=None, request_workers=8, cache=None):
+    """
+    Classifies every image in a directory or glob pattern and streams one
+    JSON line per image to `output_jsonl` as results come in.
+
+    Images are decoded and downscaled on one thread pool while the requests
+    for already prepared images run concurrently on another, so decoding and
+    uploads overlap.
+
+    Args:
+        source (str): A directory or a glob pattern of images.
+        prompt (str): The question to ask about every image.
+        output_jsonl (str): File the results are written to, one JSON object per line.
+        max_edge (int): Longest side in pixels an image is shrunk to before upload.
+        quality (int): JPEG quality used for the uploaded images.
+        decode_workers (int, optional): Threads decoding images (default: CPU count).
+        request_workers (int): Requests to the model in flight at once.
+        cache (ImageResultCache, optional): Answer duplicate and near-duplicate
+            images from earlier responses; they are marked "cached" in the output.
+
+    Returns:
+        int: The number of images processed.
+    """
+    load_dotenv()
+    if not os.getenv("GOOGLE_API_KEY"):
+        print("Error: GOOGLE_API_KEY not found in .env file.")
+        return 0
+
+    paths = find_images(source)
+    print(f"Classifying {len(paths)} images from '{source}'...")
+    decode_workers = decode_workers or os.cpu_count() or 4
+    # Decode only a little ahead of the uploads so memory stays bounded
+    max_in_flight = request_workers + decode_workers
+
+    def prepare(path):
+        original_bytes = os.path.getsize(path)
+        phash = None
+        if cache is not None:
+            phash = image_hash(path)
+            cached = cache.get(phash, prompt)
+            if cached is not None:
+                return None, original_bytes, phash, cached
+        part = prepare_image(path, max_edge, quality)
+        return part, original_bytes, phash, None
+
+    path_iter = iter(paths)
+    pending = {}  # future -> (stage, path, info)
+    processed = 0
+    with ThreadPoolExecutor(decode_workers, thread_name_prefix="ImageDecode") as decode_pool, \
+            ThreadPoolExecutor(request_workers, thread_name_prefix="ImageRequest") as request_pool, \
+            open(output_jsonl, "w", encoding="utf-8") as out:
+        while True:
+            while len(pending) < max_in_flight:
+                path = next(path_iter, None)
+                if path is None:
+                    break
+                pending[decode_pool.submit(prepare, path)] = ("decode", path, None)
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, path, info = pending.pop(future)
+                record = {"path": path}
+                try:
+                    result = future.result()
+                except Exception as e:
+                    record["error"] = str(e)
+                else:
+                    if stage == "decode":
+                        part, original_bytes, phash, cached = result
+                        if cached is not None:
+                            record.update({"response": cached, "cached": True, "original_bytes": original_bytes})
+                        else:
+                            info = {"original_bytes": original_bytes, "upload_bytes": len(part["data"])}
+                            future = request_pool.submit(_classify_prepared, part, prompt, cache, phash)
+                            pending[future] = ("request", path, info)
+                            continue
+                    else:
+                        record["response"] = result
+                if info:
+                    record.update(info)
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                processed += 1
+
+    print(f"Done. Results written to '{output_jsonl}'")
+    return processed
+
+
 if __name__ == "__main__":
     # You can change the image path and the prompt to ask different questions!
     path_to_image = "sample_image.jpg"
-    
+
     # --- Example Prompts ---
     # To classify the image: "What is the main subject of this image? Respond with one or two words."
     # To describe the image: "Describe this image in detail."
     # To ask a specific question: "Are there any buildings in this picture?"
-    
+
     user_prompt = "What is in this image? Describe it in one sentence."
-    
+
     ai_response = analyze_image(path_to_image, user_prompt)
-    
+
     print("\n--- Gemini Vision Response ---")
     print(ai_response)
-    print("----------------------------")
\ No newline at end of file
+    print("----------------------------")
+
+    # To classify a whole folder (or a glob like "photos/*.jpg") into a JSONL file:
+    # classify_images("photos", "What is the main subject of this image? Respond with one or two words.")
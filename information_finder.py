@@ -1,26 +1,73 @@
 # File: information_finder.py
+import os
+import time
+import sqlite3
+import threading
+import requests
 import wikipediaapi
+from wiki_index import WikiIndex, INDEX_PATH
+
+USER_AGENT = 'SangamSynapseProject (user@example.com)'
+API_URL = os.getenv("WIKI_API_URL", "https://en.wikipedia.org/w/api.php")
+TITLES_PER_REQUEST = 50            # Most titles the MediaWiki API accepts in one query
+CACHE_PATH = ".wiki_cache.sqlite3"
+CACHE_TTL = 7 * 24 * 3600          # Seconds before a cached summary is fetched again
+
+# Shared Wikipedia API object, created on first use
+_wiki_api = None
+# Shared offline index (see wiki_index.py), opened on first use if the file exists
+_offline_index = None
+
+
+def _get_wiki_api():
+    global _wiki_api
+    if _wiki_api is None:
+        # Create a Wikipedia API object. It's good practice to set a custom user agent.
+        # Replace 'MyAppName' and the email with your app's name and your contact info.
+        _wiki_api = wikipediaapi.Wikipedia(user_agent=USER_AGENT, language='en')
+    return _wiki_api
+
+
+def _get_offline_index():
+    global _offline_index
+    if _offline_index is None and os.path.exists(INDEX_PATH):
+        _offline_index = WikiIndex(INDEX_PATH)
+    return _offline_index
+
+
+def _lookup_offline(topic, fuzzy=True):
+    """Returns the summary from the offline index, or None if there is none."""
+    index = _get_offline_index()
+    if index is None:
+        return None
+    try:
+        match = index.lookup(topic, fuzzy=fuzzy)
+    except Exception as e:
+        print(f"Offline index lookup failed: {e}")
+        return None
+    return match[1] if match else None
+
 
 def get_web_information(topic):
     """
     Searches Wikipedia for a given topic and returns a summary.
 
+    If an offline index built with wiki_index.py exists, it is searched first
+    and the live API is only used when the topic is not in it.
+
     Args:
         topic (str): The topic you want to search for (e.g., "Kanpur", "black hole").
 
     Returns:
         str: A summary of the topic or an error message.
     """
-    try:
-        # Create a Wikipedia API object. It's good practice to set a custom user agent.
-        # Replace 'MyAppName' and the email with your app's name and your contact info.
-        wiki_api = wikipediaapi.Wikipedia(
-            user_agent='SangamSynapseProject (user@example.com)',
-            language='en'
-        )
+    summary = _lookup_offline(topic)
+    if summary:
+        return summary
 
+    try:
         # Get the Wikipedia page for the given topic
-        page = wiki_api.page(topic)
+        page = _get_wiki_api().page(topic)
 
         if page.exists():
             # The .summary contains the whole summary. We split it by newline
@@ -33,14 +80,189 @@ def get_web_information(topic):
     except Exception as e:
         return f"An error occurred: {e}"
 
+
+# --- Bulk lookups ---
+
+class WikiSummaryCache:
+    """
+    A persistent cache of first-paragraph summaries stored in SQLite.
+    Topics without a page are cached too (as None), so they are not looked
+    up again until their entry expires after `ttl` seconds.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " topic TEXT PRIMARY KEY, summary TEXT, fetched REAL NOT NULL)")
+        self._db.commit()
+
+    def get_many(self, topics):
+        """Returns {topic: summary or None} for the topics with a fresh entry."""
+        found = {}
+        with self._lock:
+            topics = list(topics)
+            # Stay well under SQLite's limit on query parameters
+            for start in range(0, len(topics), 500):
+                batch = topics[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT topic, summary, fetched FROM summaries WHERE topic IN ({','.join('?' * len(batch))})",
+                    batch)
+                for topic, summary, fetched in rows:
+                    if time.time() - fetched <= self.ttl:
+                        found[topic] = summary
+        return found
+
+    def put_many(self, summaries):
+        """Stores {topic: summary or None}."""
+        now = time.time()
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)",
+                                 [(topic, summary, now) for topic, summary in summaries.items()])
+            self._db.execute("DELETE FROM summaries WHERE fetched < ?", (now - self.ttl,))
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+def _first_paragraph(extract):
+    paragraphs = [p.strip() for p in (extract or "").split("\n") if p.strip()]
+    return paragraphs[0] if paragraphs else None
+
+
+def _query_titles(session, api_url, titles):
+    """
+    Fetches the intro extracts of up to TITLES_PER_REQUEST titles.
+
+    The API resolves normalization ("black hole" -> "Black hole") and
+    redirects itself; both maps are followed here to tie each requested title
+    to its final page. Extracts come back at most 20 at a time, so the
+    "continue" token is followed until every page has been returned.
+
+    Returns:
+        dict: requested title -> first paragraph, or None if there is no page.
+    """
+    params = {
+        "action": "query",
+        "format": "json",
+        "formatversion": "2",
+        "prop": "extracts",
+        "exintro": "1",
+        "explaintext": "1",
+        "exlimit": "max",
+        "redirects": "1",
+        "titles": "|".join(titles),
+    }
+    aliases, pages = {}, {}
+    cont = {}
+    while True:
+        response = session.get(api_url, params={**params, **cont}, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        query = data.get("query", {})
+        for item in query.get("normalized", []) + query.get("redirects", []):
+            aliases[item["from"]] = item["to"]
+        for page in query.get("pages", []):
+            if page.get("missing") or page.get("invalid"):
+                pages.setdefault(page["title"], None)
+            elif "extract" in page:
+                pages[page["title"]] = _first_paragraph(page["extract"])
+        if "continue" not in data:
+            break
+        cont = data["continue"]
+
+    results = {}
+    for title in titles:
+        final, seen = title, set()
+        # Follow normalization, then redirects (guarding against loops)
+        while final in aliases and final not in seen:
+            seen.add(final)
+            final = aliases[final]
+        results[title] = pages.get(final)
+    return results
+
+
+def get_web_information_bulk(topics, cache=None, api_url=API_URL, session=None):
+    """
+    Looks up many topics on Wikipedia with as few HTTP requests as possible.
+
+    Topics are sent TITLES_PER_REQUEST at a time in one MediaWiki query each;
+    cached topics and topics in the offline index are not requested at all.
+    Topics the API does not find either get a fuzzy offline lookup last, so
+    only real misses pay for the slower similar-title search.
+
+    Args:
+        topics (iterable): The topics to look up.
+        cache (WikiSummaryCache, optional): Persistent cache to read from and fill.
+        api_url (str): MediaWiki API endpoint.
+        session (requests.Session, optional): Session to reuse connections with.
+
+    Returns:
+        dict: topic -> first paragraph, or the same messages get_web_information gives.
+    """
+    topics = list(dict.fromkeys(t.strip() for t in topics if t and t.strip()))
+    summaries = cache.get_many(topics) if cache is not None else {}
+    # Topics in the offline index never need a request
+    for topic in topics:
+        if topic not in summaries:
+            offline = _lookup_offline(topic, fuzzy=False)
+            if offline:
+                summaries[topic] = offline
+    todo = [topic for topic in topics if topic not in summaries]
+
+    own_session = session is None
+    if own_session:
+        session = requests.Session()
+        session.headers["User-Agent"] = USER_AGENT
+    errors = {}
+    try:
+        for start in range(0, len(todo), TITLES_PER_REQUEST):
+            batch = todo[start:start + TITLES_PER_REQUEST]
+            try:
+                fetched = _query_titles(session, api_url, batch)
+            except Exception as e:
+                errors.update({topic: f"An error occurred: {e}" for topic in batch})
+                continue
+            summaries.update(fetched)
+            if cache is not None:
+                cache.put_many(fetched)
+    finally:
+        if own_session:
+            session.close()
+
+    # Last resort for topics still without a page: the closest offline title
+    for topic in todo:
+        if not summaries.get(topic):
+            offline = _lookup_offline(topic)
+            if offline:
+                summaries[topic] = offline
+                errors.pop(topic, None)
+
+    results = {}
+    for topic in topics:
+        if topic in errors:
+            results[topic] = errors[topic]
+        elif summaries.get(topic):
+            results[topic] = summaries[topic]
+        else:
+            results[topic] = f"Sorry, I could not find a Wikipedia page for '{topic}'."
+    return results
+
+
 if __name__ == "__main__":
     # Ask the user what they want to search for
     search_topic = input("What information are you looking for? > ")
-    
+
     if search_topic:
         print(f"\nSearching for '{search_topic}'...")
         information = get_web_information(search_topic)
         print("\n--- Information Found ---")
         print(information)
     else:
-        print("No topic entered.")
\ No newline at end of file
+        print("No topic entered.")
+
+    # To look up a whole list of topics in a few requests, with a cache:
+    # get_web_information_bulk(["Kanpur", "Lucknow", "black hole"], cache=WikiSummaryCache())
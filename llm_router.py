@@ -0,0 +1,271 @@
+# File: llm_router.py
+"""
+One completion interface over the interchangeable text backends
+(gemini_chat, mixtral_chat and web_search), which sends each prompt to
+the backend that is currently fastest and healthy.
+
+Optionally it hedges: if the chosen backend has not answered within its
+usual p95 latency, the prompt is also sent to the next-best backend and
+whichever answers first wins.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+WINDOW = 100               # Recent calls remembered per backend
+MAX_ERROR_RATE = 0.5       # Backends failing more often than this are skipped
+FAILURES_TO_TRIP = 3       # Consecutive failures that take a backend out of rotation...
+COOLDOWN = 30.0            # ...for this many seconds, after which one probe request may try it
+DEFAULT_HEDGE_AFTER = 2.0  # Seconds to wait before hedging while a backend has no history
+
+
+def _gemini(prompt):
+    import gemini_chat
+    return gemini_chat.get_client().generate(prompt)
+
+
+def _mixtral(prompt):
+    import mixtral_chat
+    return mixtral_chat.get_client().complete(prompt)
+
+
+def _groq(prompt):
+    import web_search
+    result = web_search.search(prompt)
+    if result.error:
+        raise RuntimeError(result.error)
+    return result.content
+
+
+# Each backend is a function that takes a prompt, returns text and raises on failure
+DEFAULT_BACKENDS = {"gemini": _gemini, "mixtral": _mixtral, "groq": _groq}
+
+
+class BackendStats:
+    """Rolling latency and error history of one backend."""
+
+    def __init__(self, window=WINDOW):
+        self.latencies = deque(maxlen=window)   # Seconds, successful calls only
+        self.outcomes = deque(maxlen=window)    # True for success, False for failure
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+        self.probing = False    # An unhealthy backend's probe request is running
+        self.lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self.lock:
+            probe, self.probing = self.probing, False
+            if ok and probe:
+                # Recovered: the failures that took it out no longer count
+                self.outcomes.clear()
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(latency)
+                self.consecutive_failures = 0
+            else:
+                self.consecutive_failures += 1
+                if (probe or self.consecutive_failures >= FAILURES_TO_TRIP
+                        or self.outcomes.count(False) > MAX_ERROR_RATE * len(self.outcomes)):
+                    self.down_until = time.monotonic() + COOLDOWN
+
+    def start_call(self):
+        """Called as a request is sent; a request to an unhealthy backend is its probe."""
+        with self.lock:
+            if not self._healthy():
+                self.probing = True
+
+    def abandon_call(self):
+        """Called for a request cancelled before it ran, so it never counts as the probe."""
+        with self.lock:
+            self.probing = False
+
+    def percentile(self, q):
+        """Latency percentile (0-100) of recent successful calls, or None without history."""
+        with self.lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * q / 100))]
+
+    @property
+    def error_rate(self):
+        with self.lock:
+            return self._error_rate()
+
+    def _error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def _healthy(self):
+        return time.monotonic() >= self.down_until and self._error_rate() <= MAX_ERROR_RATE
+
+    @property
+    def healthy(self):
+        with self.lock:
+            return self._healthy()
+
+    @property
+    def available(self):
+        """
+        True if the backend may get a request: it is healthy, or its cooldown
+        is over and no probe is running yet (half-open). Without probes, an
+        unhealthy backend would get no calls and its error rate never change.
+        """
+        with self.lock:
+            if self._healthy():
+                return True
+            return time.monotonic() >= self.down_until and not self.probing
+
+
+class LLMRouter:
+    """
+    Routes prompts to the fastest healthy backend, with optional hedging.
+
+    Args:
+        backends (dict, optional): name -> function(prompt) returning text and
+            raising on failure (default: Gemini, Mixtral and Groq).
+        hedge (bool): Send a second request when the first is slower than its p95.
+        max_workers (int): Threads available for backend calls.
+    """
+
+    def __init__(self, backends=None, hedge=True, max_workers=32):
+        self.backends = dict(backends or DEFAULT_BACKENDS)
+        self.hedge = hedge
+        self.stats = {name: BackendStats() for name in self.backends}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="LLMRouter")
+
+    def ranked_backends(self):
+        """
+        Backend names, best first: available (healthy, or due a probe) before
+        unavailable, then by median latency. Backends with no history yet go
+        first so they get measured.
+        """
+        def sort_key(name):
+            stats = self.stats[name]
+            median = stats.percentile(50)
+            return (not stats.available, median is not None, median or 0.0)
+        return sorted(self.backends, key=sort_key)
+
+    def _call(self, name, prompt):
+        """Calls one backend in the pool, recording its outcome when it finishes."""
+        start = time.perf_counter()
+        self.stats[name].start_call()
+        future = self._pool.submit(self.backends[name], prompt)
+
+        def record(done):
+            if done.cancelled():
+                # A losing hedge that never ran says nothing about the backend
+                self.stats[name].abandon_call()
+                return
+            self.stats[name].record(time.perf_counter() - start, done.exception() is None)
+
+        future.add_done_callback(record)
+        return future
+
+    def complete(self, prompt):
+        """
+        Sends a prompt to the best backend and returns its answer.
+
+        If that backend fails, the next one is tried. With hedging on, a
+        backend slower than its own p95 gets a second request racing it on
+        the next backend; the first success wins. A request still running
+        can't be interrupted, so the losing request is cancelled if it has not
+        started yet and otherwise left to finish, with its result ignored
+        (its latency is still recorded).
+
+        Returns:
+            tuple: (backend name, response text).
+
+        Raises:
+            RuntimeError: If every backend failed.
+        """
+        candidates = self.ranked_backends()
+        running = {}   # future -> backend name
+        errors = []
+
+        def launch_next():
+            if candidates:
+                name = candidates.pop(0)
+                running[self._call(name, prompt)] = name
+                return name
+            return None
+
+        primary = launch_next()
+        hedge_after = self.stats[primary].percentile(95) or DEFAULT_HEDGE_AFTER
+        hedged = not self.hedge
+
+        while running:
+            timeout = None if hedged else hedge_after
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # The primary is slower than usual: race it against the next backend
+                hedged = True
+                launch_next()
+                continue
+            for future in done:
+                name = running.pop(future)
+                if future.exception() is None:
+                    for other in running:
+                        other.cancel()
+                    return name, future.result()
+                errors.append(f"{name}: {future.exception()}")
+            if not running:
+                # Everything in flight failed: fail over to the next backend
+                launch_next()
+
+        raise RuntimeError("All backends failed. " + "; ".join(errors))
+
+    def report(self):
+        """Returns {backend: {"p50", "p95", "error_rate", "healthy"}} for monitoring."""
+        return {
+            name: {
+                "p50": stats.percentile(50),
+                "p95": stats.percentile(95),
+                "error_rate": stats.error_rate,
+                "healthy": stats.healthy,
+            }
+            for name, stats in self.stats.items()
+        }
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Shared router, created on first use
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    """Returns the shared LLMRouter, creating it on first use."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = LLMRouter()
+    return _router
+
+
+def get_completion(prompt):
+    """Sends a prompt to the fastest healthy backend and returns the response."""
+    try:
+        _, response = get_router().complete(prompt)
+        return response
+    except Exception as e:
+        return f"An error occurred: {e}"
+
+
+if __name__ == "__main__":
+    print("--- Routed AI Chat Interface ---")
+    print("Type 'quit' to exit.")
+    router = get_router()
+    while True:
+        user_prompt = input("\nYou: ")
+        if user_prompt.lower() == 'quit':
+            break
+        try:
+            backend, ai_response = router.complete(user_prompt)
+            print(f"AI ({backend}): {ai_response}")
+        except Exception as e:
+            print(f"An error occurred: {e}")
+    print(router.report())
@@ -0,0 +1,134 @@
+# File: local_image_classifier.py
+"""
+Offline image classification with a Hugging Face transformers model that is
+loaded once from a local folder and run on the CPU with torch.
+
+It mirrors image_classifier.analyze_image, so bulk labelling jobs can switch
+to it and skip the per-image network round-trip entirely.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from PIL import Image, ImageOps
+
+load_dotenv()
+
+# Folder holding a model saved with save_pretrained() (config, weights and preprocessor)
+LOCAL_MODEL_PATH = os.getenv("LOCAL_VISION_MODEL_PATH", "models/vit-base-patch16-224")
+BATCH_SIZE = 16
+
+
+def _load_image(image_path, size):
+    """Decodes an image as RGB, letting JPEG decoding skip unneeded detail."""
+    with Image.open(image_path) as img:
+        img.draft("RGB", (size, size))
+        return ImageOps.exif_transpose(img).convert("RGB")
+
+
+class LocalImageClassifier:
+    """
+    Wraps a local image-classification model for batched CPU inference.
+
+    The model and its preprocessor are loaded once, in __init__. Dynamic int8
+    quantization converts the Linear layers to int8 kernels, which is usually
+    much faster on CPUs for transformer models at a small accuracy cost.
+    """
+
+    def __init__(self, model_path=LOCAL_MODEL_PATH, num_threads=None, quantize=False):
+        # torch and transformers are heavy imports, so only pay for them here
+        import torch
+        from transformers import AutoImageProcessor, AutoModelForImageClassification
+
+        self._torch = torch
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.processor = AutoImageProcessor.from_pretrained(model_path, local_files_only=True)
+        model = AutoModelForImageClassification.from_pretrained(model_path, local_files_only=True)
+        model.eval()
+        if quantize:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+        self.labels = model.config.id2label
+
+        # Decode to roughly the size the processor resizes to anyway
+        size = getattr(self.processor, "size", None) or {}
+        self._decode_size = max(size.values()) if isinstance(size, dict) and size else 224
+
+    def classify(self, image_paths, batch_size=BATCH_SIZE, top_k=1):
+        """
+        Classifies many images, running the model on `batch_size` at a time.
+
+        Args:
+            image_paths (list): Paths of the images to classify.
+            batch_size (int): Images per forward pass.
+            top_k (int): How many labels to return per image.
+
+        Returns:
+            list: For each image, a list of (label, score) pairs, best first.
+        """
+        torch = self._torch
+        results = []
+        with ThreadPoolExecutor() as decode_pool:
+            for start in range(0, len(image_paths), batch_size):
+                batch_paths = image_paths[start:start + batch_size]
+                images = list(decode_pool.map(lambda p: _load_image(p, self._decode_size), batch_paths))
+                inputs = self.processor(images=images, return_tensors="pt")
+                with torch.inference_mode():
+                    logits = self.model(**inputs).logits
+                scores, indices = logits.softmax(dim=-1).topk(top_k, dim=-1)
+                for row_scores, row_indices in zip(scores.tolist(), indices.tolist()):
+                    results.append([(self.labels[i], s) for i, s in zip(row_indices, row_scores)])
+        return results
+
+    def analyze_image(self, image_path, prompt=None):
+        """
+        Classifies one image, like image_classifier.analyze_image.
+
+        Args:
+            image_path (str): The path to the image file.
+            prompt (str, optional): Ignored; a classifier has a fixed label set.
+                Accepted so this can stand in for the Gemini backend.
+
+        Returns:
+            str: The best label, or an error message.
+        """
+        try:
+            label, _ = self.classify([image_path])[0][0]
+            return label
+        except FileNotFoundError:
+            return f"Error: The file '{image_path}' was not found."
+        except Exception as e:
+            return f"An error occurred: {e}"
+
+
+# Shared classifier, loaded on first use
+_classifier = None
+
+
+def analyze_image(image_path, prompt=None):
+    """
+    Classifies an image with the local model, loading it on the first call.
+
+    Args:
+        image_path (str): The path to the image file.
+        prompt (str, optional): Ignored; kept for the same call shape as the Gemini backend.
+
+    Returns:
+        str: The best label, or an error message.
+    """
+    global _classifier
+    try:
+        if _classifier is None:
+            _classifier = LocalImageClassifier()
+    except Exception as e:
+        return f"Error: Could not load the local model from '{LOCAL_MODEL_PATH}': {e}"
+    return _classifier.analyze_image(image_path, prompt)
+
+
+if __name__ == "__main__":
+    path_to_image = "sample_image.jpg"
+
+    print("\n--- Local Classifier Response ---")
+    print(analyze_image(path_to_image))
+    print("----------------------------")
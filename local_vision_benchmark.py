@@ -0,0 +1,35 @@
+# File: local_vision_benchmark.py
+"""
+Measures how many images per second the local classifier handles on this
+machine for different batch sizes, with and without int8 quantization.
+
+Usage:
+    python local_vision_benchmark.py [image_path] [num_images] [num_threads]
+"""
+import sys
+import time
+
+from local_image_classifier import LocalImageClassifier
+
+BATCH_SIZES = [1, 4, 8, 16, 32]
+
+
+def bench(classifier, image_paths, batch_size):
+    """Returns images per second for one batch size (after a warm-up pass)."""
+    classifier.classify(image_paths[:batch_size], batch_size=batch_size)
+    start = time.perf_counter()
+    classifier.classify(image_paths, batch_size=batch_size)
+    return len(image_paths) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    image_path = sys.argv[1] if len(sys.argv) > 1 else "sample_image.jpg"
+    num_images = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    num_threads = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    image_paths = [image_path] * num_images
+
+    for quantize in (False, True):
+        classifier = LocalImageClassifier(num_threads=num_threads, quantize=quantize)
+        print(f"\n--- {'int8 quantized' if quantize else 'float32'} model, {num_images} images ---")
+        for batch_size in BATCH_SIZES:
+            print(f"batch size {batch_size:3d}: {bench(classifier, image_paths, batch_size):7.1f} images/s")
@@ -0,0 +1,169 @@
+# File: mixtral_benchmark.py
+"""
+Benchmarks the Mixtral client against a local stand-in HTTP server that
+speaks the same chat-completions format, so no API key or network is needed.
+
+It measures:
+  * connection reuse: how many TCP connections the server saw for N requests
+    with a bare requests.post versus the pooled MixtralClient session.
+  * time-to-first-token: when the first text reaches the caller with a
+    buffered request versus "stream": true.
+"""
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from mixtral_chat import MixtralClient
+
+TOKENS = ["Uttar ", "Pradesh ", "is ", "the ", "most ", "populous ", "state ", "in ", "India", "."]
+TOKEN_DELAY = 0.02  # Seconds the stand-in server "thinks" per generated token
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers POSTs like the Mistral chat-completions endpoint."""
+
+    # HTTP/1.1 keeps connections open between requests
+    protocol_version = "HTTP/1.1"
+    # Send small writes at once instead of waiting on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        # One handler instance is created per TCP connection
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass  # Keep the benchmark output clean
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        with self.server.lock:
+            self.server.requests += 1
+
+        if request.get("stream"):
+            self._send_stream()
+        else:
+            self._send_full()
+
+    def _send_full(self):
+        # A buffered reply only goes out once every token is generated
+        time.sleep(self.server.token_delay * len(TOKENS))
+        body = json.dumps({
+            "choices": [{"message": {"role": "assistant", "content": "".join(TOKENS)}}]
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in TOKENS:
+            time.sleep(self.server.token_delay)
+            event = {"choices": [{"delta": {"content": token}}]}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")  # Zero-length chunk ends the body
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start_stand_in_server(handler=StandInHandler):
+    """
+    Starts the stand-in server on a free local port in a background thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server; its url attribute is the
+        endpoint to point clients at. Call shutdown() when done.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = 0
+    server.token_delay = TOKEN_DELAY
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    threading.Thread(target=server.serve_forever, daemon=True, name="StandInServer").start()
+    return server
+
+
+def _reset_counters(server):
+    with server.lock:
+        server.connections = 0
+        server.requests = 0
+
+
+def bench_connection_reuse(server, n_requests):
+    """Counts server-side connections for bare posts versus the pooled session."""
+    payload = json.dumps({"model": "bench", "messages": [{"role": "user", "content": "hi"}]})
+    headers = {"Content-Type": "application/json", "Authorization": "Bearer bench"}
+
+    # Answer instantly so the timings show connection set-up cost only
+    server.token_delay = 0
+    _reset_counters(server)
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        requests.post(server.url, headers=headers, data=payload).json()
+    bare_time = time.perf_counter() - start
+    bare_connections = server.connections
+
+    client = MixtralClient(api_key="bench", api_url=server.url)
+    _reset_counters(server)
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        client.complete("hi")
+    pooled_time = time.perf_counter() - start
+    pooled_connections = server.connections
+    client.close()
+    server.token_delay = TOKEN_DELAY
+
+    print(f"\n--- Connection reuse ({n_requests} requests) ---")
+    print(f"bare requests.post : {bare_connections:4d} connections, {bare_time:.3f}s total")
+    print(f"pooled session     : {pooled_connections:4d} connections, {pooled_time:.3f}s total")
+
+
+def bench_time_to_first_token(server, n_requests):
+    """Compares time-to-first-token for buffered and streamed completions."""
+    client = MixtralClient(api_key="bench", api_url=server.url)
+    client.complete("warm-up")  # Open the pooled connection first
+
+    buffered = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        client.complete("hi")
+        buffered.append(time.perf_counter() - start)
+
+    streamed = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        first = None
+        for _ in client.stream("hi"):
+            if first is None:
+                first = time.perf_counter() - start
+        streamed.append(first)
+    client.close()
+
+    print(f"\n--- Time to first token ({n_requests} requests) ---")
+    print(f"buffered : p50 {statistics.median(buffered) * 1000:7.1f} ms")
+    print(f"streamed : p50 {statistics.median(streamed) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    server = start_stand_in_server()
+    try:
+        bench_connection_reuse(server, n_requests=50)
+        bench_time_to_first_token(server, n_requests=10)
+    finally:
+        server.shutdown()
@@ -1,9 +1,18 @@
 # File: mixtral_chat.py
 
 import os
+import asyncio
+import random
+import threading
+import time
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from single_flight import flights, make_key
+from response_cache import make_key as response_key
 
 # Load environment variables from .env file
 load_dotenv()
@@ -11,30 +20,348 @@ load_dotenv()
 # Get Mixtral API key and URL from .env file
 API_KEY = os.getenv("MIXTRAL_API_KEY")
 API_URL = os.getenv("MIXTRAL_API_URL", "https://api.mistral.ai/v1/chat/completions")
+MODEL_NAME = "mistral-large-latest"
+TIMEOUT = 60  # Seconds to wait for the server before giving up
+RETRY_STATUSES = {429, 500, 502, 503, 504}  # Statuses worth retrying in batch mode
 
-def get_mixtral_response(prompt):
-    """Sends a prompt to the Mixtral AI and returns the response."""
-    if not API_KEY:
-        return "Error: MIXTRAL_API_KEY not found in .env file."
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {API_KEY}"
-    }
-    data = {
-        "model": "mistral-large-latest",
-        "messages": [{"role": "user", "content": prompt}]
-    }
+def iter_sse_data(lines):
+    """
+    Parses server-sent events from an iterable of raw lines.
+
+    Each event is a group of "data:" lines ended by a blank line; the data
+    of one event is joined with newlines, as the SSE format specifies.
+
+    Args:
+        lines (iterable): Lines of the response body (bytes or str), without
+            their line endings.
+
+    Yields:
+        str: The data payload of each event.
+    """
+    data_lines = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line:
+            # A blank line ends the current event
+            if data_lines:
+                yield "\n".join(data_lines)
+                data_lines = []
+            continue
+        if line.startswith(":"):
+            continue  # Comment / keep-alive line
+        field, _, value = line.partition(":")
+        if field == "data":
+            data_lines.append(value[1:] if value.startswith(" ") else value)
+    if data_lines:
+        yield "\n".join(data_lines)
+
+
+class MixtralClient:
+    """
+    A Mixtral client backed by one requests.Session. The session keeps
+    connections alive in a pool, so only the first request to the server
+    pays for the TCP and TLS handshake.
+    """
+
+    def __init__(self, api_key=API_KEY, api_url=API_URL, model_name=MODEL_NAME,
+                 pool_size=10, timeout=TIMEOUT):
+        if not api_key:
+            raise ValueError("MIXTRAL_API_KEY not found in .env file.")
+        self.api_url = api_url
+        self.model_name = model_name
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        })
+
+    def _payload(self, prompt, stream=False):
+        data = {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if stream:
+            data["stream"] = True
+        return json.dumps(data)
+
+    def post(self, prompt):
+        """Sends a prompt and returns the raw (non-streaming) response."""
+        return self.session.post(self.api_url, data=self._payload(prompt), timeout=self.timeout)
+
+    def complete(self, prompt):
+        """
+        Sends a prompt and returns the full response text.
+
+        Raises:
+            RuntimeError: If the API does not answer with status 200.
+        """
+        response = self.post(prompt)
+        if response.status_code != 200:
+            raise RuntimeError(f"API returned status code {response.status_code}. Response: {response.text}")
+        return response.json()['choices'][0]['message']['content'].strip()
+
+    def stream(self, prompt):
+        """
+        Sends a prompt with "stream": true and yields tokens as the server
+        sends them, instead of waiting for the whole completion.
+
+        Args:
+            prompt (str): The prompt to send.
+
+        Yields:
+            str: The next piece of the response text.
+
+        Raises:
+            RuntimeError: If the API does not answer with status 200.
+        """
+        with self.session.post(self.api_url, data=self._payload(prompt, stream=True),
+                               timeout=self.timeout, stream=True) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"API returned status code {response.status_code}. Response: {response.text}")
+            # chunk_size=None hands over data as soon as it is received
+            for data in iter_sse_data(response.iter_lines(chunk_size=None)):
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                choices = event.get("choices") or []
+                if not choices:
+                    continue
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    yield content
+
+    def close(self):
+        """Closes all pooled connections."""
+        self.session.close()
+
+
+# Shared client, created on first use and reused for every later prompt
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Returns the shared MixtralClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MixtralClient()
+    return _client
+
+
+def _ask_mixtral(prompt):
+    """Returns (text, ok): ok is False when text is an error message."""
+    if not API_KEY:
+        return "Error: MIXTRAL_API_KEY not found in .env file.", False
 
     try:
-        response = requests.post(API_URL, headers=headers, data=json.dumps(data))
+        response = get_client().post(prompt)
         if response.status_code == 200:
             response_data = response.json()
-            return response_data['choices'][0]['message']['content'].strip()
+            return response_data['choices'][0]['message']['content'].strip(), True
         else:
-            return f"Error: API returned status code {response.status_code}. Response: {response.text}"
+            return f"Error: API returned status code {response.status_code}. Response: {response.text}", False
     except Exception as e:
-        return f"An error occurred: {e}"
+        return f"An error occurred: {e}", False
+
+
+def _cache_answer(response_cache, prompt, answer):
+    # Every caller sharing a call fills its own cache; error messages are never cached
+    text, ok = answer
+    if ok and response_cache is not None:
+        response_cache.put(response_key("mixtral", MODEL_NAME, [prompt]), text)
+    return text
+
+
+def get_mixtral_response(prompt, response_cache=None):
+    """
+    Sends a prompt to the Mixtral AI and returns the response.
+
+    Identical prompts asked at the same time (e.g. from several threads)
+    share one API call.
+
+    Args:
+        prompt (str): The prompt to send.
+        response_cache (ResponseCache, optional): Answer repeat prompts from
+            earlier responses without calling the API.
+    """
+    if response_cache is not None:
+        cached = response_cache.get(response_key("mixtral", MODEL_NAME, [prompt]))
+        if cached is not None:
+            return cached
+    answer = flights.do(make_key("mixtral", MODEL_NAME, prompt), _ask_mixtral, prompt)
+    return _cache_answer(response_cache, prompt, answer)
+
+
+async def get_mixtral_response_async(prompt, response_cache=None):
+    """The asyncio version of get_mixtral_response."""
+    if response_cache is not None:
+        cached = response_cache.get(response_key("mixtral", MODEL_NAME, [prompt]))
+        if cached is not None:
+            return cached
+    answer = await flights.do_async(make_key("mixtral", MODEL_NAME, prompt), _ask_mixtral, prompt)
+    return _cache_answer(response_cache, prompt, answer)
+
+
+def stream_mixtral_response(prompt):
+    """
+    Sends a prompt to the Mixtral AI and yields the response as it streams in.
+
+    Args:
+        prompt (str): The prompt to send.
+
+    Yields:
+        str: Pieces of the response text, or a single error message.
+    """
+    if not API_KEY:
+        yield "Error: MIXTRAL_API_KEY not found in .env file."
+        return
+
+    try:
+        yield from get_client().stream(prompt)
+    except RuntimeError as e:
+        yield f"Error: {e}"
+    except Exception as e:
+        yield f"An error occurred: {e}"
+
+
+def _retry_after_seconds(response):
+    """Reads the Retry-After header (seconds or an HTTP date), or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+async def _complete_with_retries(client, executor, prompt, max_retries, base_delay, max_delay):
+    """
+    Runs one blocking request in a worker thread, retrying rate limits and
+    server errors. A 429 waits for the server's Retry-After when given,
+    otherwise the wait grows exponentially with full jitter.
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(max_retries + 1):
+        try:
+            response = await loop.run_in_executor(executor, client.post, prompt)
+        except requests.RequestException as e:
+            if attempt == max_retries:
+                return f"An error occurred: {e}"
+            response = None
+
+        if response is not None:
+            if response.status_code == 200:
+                try:
+                    return response.json()['choices'][0]['message']['content'].strip()
+                except Exception as e:
+                    return f"An error occurred: {e}"
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return f"Error: API returned status code {response.status_code}. Response: {response.text}"
+
+        delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+        if response is not None and response.status_code == 429:
+            retry_after = _retry_after_seconds(response)
+            if retry_after is not None:
+                # Honour the server, plus a little jitter so waiters don't all return at once
+                delay = retry_after + random.uniform(0, base_delay)
+        await asyncio.sleep(delay)
+
+
+async def run_mixtral_batch(prompts, concurrency=8, max_retries=5, base_delay=1.0, max_delay=60.0,
+                            client=None):
+    """
+    Sends many prompts to the Mixtral AI concurrently and yields each result
+    as soon as it is ready.
+
+    Prompts are read from the iterable lazily, so at most `concurrency`
+    requests are in flight and huge or endless inputs are fine.
+
+    Args:
+        prompts (iterable): The prompts to send.
+        concurrency (int): Maximum number of requests in flight at once.
+        max_retries (int): Retries per prompt after a 429, 5xx or network error.
+        base_delay (float): First backoff delay in seconds; doubles per retry.
+        max_delay (float): Upper bound on a single backoff delay in seconds.
+        client (MixtralClient, optional): Client to use. By default a new one
+            with a connection pool as large as `concurrency` is used.
+
+    Yields:
+        tuple: (index, response) in completion order, where index is the
+        prompt's position in the input and response is the text or an
+        error message.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    own_client = client is None
+    if own_client:
+        client = MixtralClient(pool_size=concurrency)
+    # One worker thread per in-flight request, so the cap is ours and not the default executor's
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="MixtralBatch")
+
+    prompt_iter = enumerate(prompts)
+    pending = {}  # task -> input index
+    try:
+        while True:
+            # Top up the in-flight set from the input
+            while len(pending) < concurrency:
+                item = next(prompt_iter, None)
+                if item is None:
+                    break
+                index, prompt = item
+                task = asyncio.ensure_future(
+                    _complete_with_retries(client, executor, prompt, max_retries, base_delay, max_delay))
+                pending[task] = index
+            if not pending:
+                break
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield pending.pop(task), task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+        if own_client:
+            client.close()
+
+
+def get_mixtral_responses(prompts, concurrency=8, **kwargs):
+    """
+    Blocking helper around run_mixtral_batch for scripts without an event loop.
+
+    Args:
+        prompts (iterable): The prompts to send.
+        concurrency (int): Maximum number of requests in flight at once.
+        **kwargs: Passed on to run_mixtral_batch.
+
+    Returns:
+        list: The responses, in the same order as the prompts.
+    """
+    if not API_KEY and kwargs.get("client") is None:
+        return ["Error: MIXTRAL_API_KEY not found in .env file."] * len(list(prompts))
+
+    async def collect():
+        results = {}
+        async for index, response in run_mixtral_batch(prompts, concurrency, **kwargs):
+            results[index] = response
+        return [results[i] for i in range(len(results))]
+
+    return asyncio.run(collect())
+
 
 if __name__ == "__main__":
     print("--- Mixtral AI Chat Interface ---")
@@ -43,5 +370,8 @@ if __name__ == "__main__":
         user_prompt = input("\nYou: ")
         if user_prompt.lower() == 'quit':
             break
-        ai_response = get_mixtral_response(user_prompt)
-        print(f"Mixtral AI: {ai_response}")
\ No newline at end of file
+        # Print each token as soon as it arrives
+        print("Mixtral AI: ", end="", flush=True)
+        for text in stream_mixtral_response(user_prompt):
+            print(text, end="", flush=True)
+        print()
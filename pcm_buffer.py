@@ -0,0 +1,156 @@
+# File: pcm_buffer.py
+"""
+A fixed-size ring buffer of raw PCM audio between the thread receiving
+audio and the thread playing it.
+
+All memory is allocated once up front. Incoming chunks are copied
+straight into it through memoryviews, and the player takes out exactly one
+stream buffer (CHUNK frames) at a time, so nothing is allocated per chunk
+and the sound card is always written whole frames.
+"""
+import threading
+import time
+
+
+class PCMRingBuffer:
+    """
+    Args:
+        capacity (int): Size of the buffer in bytes (rounded down to whole frames).
+        frame_bytes (int): Bytes per frame (sample width x channels).
+        start_bytes (int): Jitter buffer: how much audio must be buffered
+            before playback starts (or restarts after running dry), so small
+            network hiccups don't become audible gaps. The end of an
+            utterance (see end()) starts playback early.
+    """
+
+    def __init__(self, capacity, frame_bytes=2, start_bytes=0):
+        self.frame_bytes = frame_bytes
+        self.capacity = capacity - capacity % frame_bytes
+        self.start_bytes = min(start_bytes, self.capacity)
+        self._data = bytearray(self.capacity)
+        self._view = memoryview(self._data)
+        self._read = 0          # Position of the oldest unread byte
+        self._size = 0          # Bytes buffered
+        self._playing = False   # False while the jitter buffer is filling
+        self._ended = False     # The current utterance has no more audio coming
+        self._closed = False
+        self.generation = 0     # Bumped by clear(): audio written for an older one is dropped
+        self._cond = threading.Condition()
+        self.underruns = 0      # Times playback ran dry in the middle of an utterance
+
+    @property
+    def buffered(self):
+        """Bytes currently waiting to be played."""
+        return self._size
+
+    def write(self, data, timeout=None, generation=None):
+        """
+        Copies audio into the buffer. When it is full this waits for the
+        player to make room (backpressure), so a fast sender can't make it
+        grow without bound.
+
+        Args:
+            data (bytes-like): Raw PCM audio.
+            timeout (float, optional): Most seconds to wait for room.
+            generation (int, optional): The generation the audio belongs to.
+                If the buffer has been cleared since, the audio is stale and
+                is dropped without being copied.
+
+        Returns:
+            int: Bytes written; fewer than len(data) if the timeout passed or
+            the buffer was cleared or closed while waiting.
+        """
+        src = memoryview(data).cast("B")
+        total = len(src)
+        written = 0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if generation is None:
+                generation = self.generation
+            while written < total and generation == self.generation:
+                while self._size == self.capacity and not self._closed:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return written
+                    self._cond.wait(remaining)
+                    if self.generation != generation:
+                        # clear() dropped the audio this belongs to
+                        return written
+                if self._closed:
+                    return written
+                # Copy as much as fits, in at most two pieces around the wrap point
+                end = (self._read + self._size) % self.capacity
+                space = min(self.capacity - self._size, self.capacity - end, total - written)
+                self._view[end:end + space] = src[written:written + space]
+                written += space
+                self._size += space
+                self._ended = False
+                if not self._playing and self._size >= self.start_bytes:
+                    self._playing = True
+                self._cond.notify_all()
+        return written
+
+    def end(self):
+        """Marks the end of an utterance, so its last partial chunk gets played."""
+        with self._cond:
+            self._ended = True
+            if self._size:
+                self._playing = True
+            self._cond.notify_all()
+
+    def read_into(self, out):
+        """
+        Waits for a full chunk of audio and copies it into `out` (a writable
+        buffer whose size is a whole number of frames). At the end of an
+        utterance the last partial chunk is padded with silence.
+
+        Returns:
+            int: len(out), or 0 once the buffer has been closed.
+        """
+        out = memoryview(out).cast("B")
+        wanted = len(out)
+        with self._cond:
+            while True:
+                if self._closed:
+                    return 0
+                if self._playing and (self._size >= wanted or (self._ended and self._size)):
+                    break
+                self._cond.wait()
+            count = min(wanted, self._size)
+            first = min(count, self.capacity - self._read)
+            out[:first] = self._view[self._read:self._read + first]
+            out[first:count] = self._view[:count - first]
+            if count < wanted:
+                out[count:] = bytes(wanted - count)
+            self._read = (self._read + count) % self.capacity
+            self._size -= count
+            if not self._size:
+                if not self._ended:
+                    # Ran dry mid-utterance: refill the jitter buffer before going on
+                    self.underruns += 1
+                self._playing = False
+                self._ended = False
+            self._cond.notify_all()
+        return wanted
+
+    def clear(self):
+        """
+        Drops everything buffered and starts a new generation: writers still
+        holding audio of the old one (waiting for room or not) have it dropped.
+
+        Returns:
+            int: Bytes dropped.
+        """
+        with self._cond:
+            dropped = self._size
+            self._read = self._size = 0
+            self._playing = self._ended = False
+            self.generation += 1
+            self._cond.notify_all()
+        return dropped
+
+    def close(self):
+        """Wakes every waiting reader and writer for shutdown."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
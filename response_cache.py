@@ -0,0 +1,220 @@
+# File: response_cache.py
+"""
+A response cache that gemini_chat, mixtral_chat, text_summarize,
+image_classifier and web_search can all opt into (each takes a
+`response_cache` argument).
+
+Recently used responses live in an in-memory LRU, so a repeat prompt is
+answered in microseconds; every response is also written to SQLite, so
+they survive restarts. Keys hash everything that affects a response:
+the backend, the model, the request parameters and the input itself
+(text or raw bytes, e.g. an image file). Responses are stored as JSON, so
+reading the store back never runs code from the file.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+CACHE_PATH = ".response_cache.sqlite3"
+MEMORY_ENTRIES = 1024               # Responses kept in memory
+MAX_BYTES = 256 * 1024 * 1024       # Size bound of the on-disk store
+
+
+def make_key(namespace, model, inputs, params=None):
+    """
+    Hashes everything that affects a response into one cache key.
+
+    Args:
+        namespace (str): The backend or kind of request, e.g. "gemini" or "image".
+            Its TTL is looked up under this name.
+        model (str): The model name.
+        inputs (list): The input parts, as str or bytes.
+        params (dict, optional): Request parameters (temperature, max_edge, ...).
+
+    Returns:
+        tuple: (namespace, hex digest).
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    # The namespace is hashed too: namespaces share the store but never its rows
+    digest.update(json.dumps([namespace, model, params or {}], sort_keys=True, default=str).encode("utf-8"))
+    for part in inputs:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        # Prefix each part with its length so different splits never collide
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return namespace, digest.hexdigest()
+
+
+def _to_json(value):
+    """json.dumps hook for API objects (e.g. Groq tool calls) that can dump themselves to dicts."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ResponseCache:
+    """
+    An in-memory LRU in front of a size-bounded SQLite store.
+
+    Args:
+        path (str): SQLite file for the on-disk store.
+        ttls (dict, optional): namespace -> seconds an entry stays valid.
+            Namespaces that are not listed use `default_ttl`.
+        default_ttl (float, optional): Seconds an entry stays valid (None: forever).
+        memory_entries (int): Most responses kept in memory.
+        max_bytes (int): Once the stored responses are bigger than this, the
+            least recently used ones are evicted.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttls=None, default_ttl=None,
+                 memory_entries=MEMORY_ENTRIES, max_bytes=MAX_BYTES):
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()   # key -> (value, expires at or None)
+        self._counts = Counter()       # (namespace, "memory_hits" | "disk_hits" | "misses")
+        self._touched = {}             # digest -> time of memory hits not yet written to disk
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, namespace TEXT NOT NULL, value BLOB NOT NULL,"
+            " size INTEGER NOT NULL, expires REAL, last_used REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._db.commit()
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _expires(self, namespace):
+        ttl = self.ttls.get(namespace, self.default_ttl)
+        return None if ttl is None else time.time() + ttl
+
+    def _remember(self, key, value, expires):
+        self._memory[key] = (value, expires)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Returns the cached response for a key from make_key(), or None on a miss."""
+        namespace = key[0]
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.time():
+                    self._memory.move_to_end(key)
+                    # Recorded here and written later, so memory hits never touch the disk
+                    self._touched[key[1]] = time.time()
+                    self._counts[namespace, "memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            row = self._db.execute(
+                "SELECT value, expires FROM responses WHERE key = ?", (key[1],)).fetchone()
+            if row is None or (row[1] is not None and row[1] <= time.time()):
+                self._counts[namespace, "misses"] += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key[1]))
+            self._db.commit()
+            try:
+                value = json.loads(row[0])
+            except ValueError:
+                # Not written by put() (e.g. a corrupted file): treat it as a miss
+                self._counts[namespace, "misses"] += 1
+                return None
+            self._remember(key, value, row[1])
+            self._counts[namespace, "disk_hits"] += 1
+            return value
+
+    def put(self, key, value):
+        """Stores a response, evicting the least recently used ones if the store is full."""
+        namespace = key[0]
+        expires = self._expires(namespace)
+        now = time.time()
+        try:
+            data = json.dumps(value, default=_to_json).encode("utf-8")
+            # Memory hits return what a disk hit would, not the caller's object
+            value = json.loads(data)
+        except (TypeError, ValueError) as e:
+            # Still worth keeping in memory even if it can't be stored on disk
+            print(f"Response not stored on disk: {e}")
+            data = None
+        with self._lock:
+            self._remember(key, value, expires)
+            if data is None:
+                return
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key[1],)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                             (key[1], namespace, data, len(data), expires, now))
+            self._bytes += len(data) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict(now)
+            self._db.commit()
+
+    def _flush_touched(self):
+        if self._touched:
+            self._db.executemany("UPDATE responses SET last_used = ? WHERE key = ?",
+                                 [(used, digest) for digest, used in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self, now):
+        # Entries served from memory must count as recently used
+        self._flush_touched()
+        # Expired entries go first, then the least recently used until under the bound
+        self._db.execute("DELETE FROM responses WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_used")
+        doomed = []
+        for key, size in rows:
+            if self._bytes <= self.max_bytes:
+                break
+            doomed.append((key,))
+            self._bytes -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def get_or_call(self, key, fn, *args):
+        """
+        Returns the cached response for key, or calls fn(*args) and caches
+        what it returns. Exceptions are not cached.
+        """
+        value = self.get(key)
+        if value is None:
+            value = fn(*args)
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def stats(self):
+        """
+        Returns:
+            dict: Per namespace, memory hits, disk hits, misses and hit rate, plus
+            the totals and current size of the store under "total".
+        """
+        with self._lock:
+            counts = dict(self._counts)
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            stored = self._bytes
+        report = {}
+        for (namespace, kind), count in counts.items():
+            report.setdefault(namespace, {"memory_hits": 0, "disk_hits": 0, "misses": 0})[kind] = count
+        total = {kind: sum(r[kind] for r in report.values()) for kind in ("memory_hits", "disk_hits", "misses")}
+        for counters in list(report.values()) + [total]:
+            lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+            hits = counters["memory_hits"] + counters["disk_hits"]
+            counters["hit_rate"] = hits / lookups if lookups else 0.0
+        total.update({"entries": entries, "bytes": stored, "evictions": self.evictions})
+        report["total"] = total
+        return report
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._db.commit()
+        self._db.close()
@@ -0,0 +1,131 @@
+# File: single_flight.py
+"""
+Collapses identical concurrent requests into one upstream call.
+
+While a request for a key is running, every other caller asking for the
+same key waits for that call and gets its result, instead of sending (and
+paying for) a request of its own. Once the call finishes the key is
+forgotten, so later callers send a fresh request; this is not a cache.
+
+Both plain/threaded callers (do) and asyncio callers (do_async) share the
+same in-flight calls.
+"""
+import asyncio
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+def make_key(backend, model, prompt, contract=None):
+    """
+    Key for a request: backend, model and the prompt with its whitespace
+    collapsed, so prompts differing only in spacing share a call. The prompt
+    is hashed to keep keys small however long it is.
+
+    Calls that send the same prompt but return results differently (e.g.
+    one returns an error message, another raises) must pass different
+    `contract` names, so neither gets a result it doesn't expect.
+    """
+    normalized = " ".join(prompt.split())
+    digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+    return backend, model, digest, contract
+
+
+class SingleFlight:
+    """
+    A group of in-flight calls, keyed by make_key().
+
+    Args:
+        max_workers (int): Threads that run calls started by asyncio callers.
+    """
+
+    def __init__(self, max_workers=32):
+        self._lock = threading.Lock()
+        self._in_flight = {}       # key -> Future of the running call
+        self._calls = Counter()    # backend -> requests made
+        self._coalesced = Counter()  # backend -> requests that joined a running call
+        self._max_workers = max_workers
+        self._executor = None
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def do(self, key, fn, *args):
+        """
+        Runs fn(*args) in this thread, unless the same key is already running,
+        in which case it waits for that call instead.
+
+        Returns:
+            The call's result. If the call raised, every waiter gets the exception.
+        """
+        with self._lock:
+            self._calls[key[0]] += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                future.set_running_or_notify_cancel()
+                self._in_flight[key] = future
+            else:
+                self._coalesced[key[0]] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            # Forget the key before waking the waiters, so nobody joins a finished call
+            self._forget(key, future)
+            future.set_exception(e)
+            raise
+        self._forget(key, future)
+        future.set_result(result)
+        return result
+
+    async def do_async(self, key, fn, *args):
+        """
+        The asyncio version of do(): fn(*args) is a blocking function and runs
+        on a worker thread, so the event loop keeps going while it waits.
+
+        Cancelling the awaiting task does not cancel the shared call, as other
+        callers may still be waiting for it.
+        """
+        with self._lock:
+            self._calls[key[0]] += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                        thread_name_prefix="SingleFlight")
+                future = self._executor.submit(fn, *args)
+                self._in_flight[key] = future
+            else:
+                self._coalesced[key[0]] += 1
+        if leader:
+            # Outside the lock: the callback runs at once if the call already finished
+            future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def stats(self):
+        """
+        Returns:
+            dict: Per backend, how many requests were made, how many were sent
+            upstream and how many joined a call already running.
+        """
+        with self._lock:
+            return {
+                backend: {
+                    "requests": calls,
+                    "upstream": calls - self._coalesced[backend],
+                    "coalesced": self._coalesced[backend],
+                }
+                for backend, calls in self._calls.items()
+            }
+
+
+# The group shared by gemini_chat, mixtral_chat and text_summarize
+flights = SingleFlight()
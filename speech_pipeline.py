@@ -0,0 +1,268 @@
+# File: speech_pipeline.py
+"""
+Speaks an answer while it is still being generated.
+
+Tokens from a streaming LLM (gemini_chat.stream_gemini_response,
+mixtral_chat.stream_mixtral_response, ...) are cut into segments at
+sentence and clause boundaries, and each segment is sent to Deepgram as
+soon as it is ready. The first sentence is heard while the rest of the
+answer is still being written, so time-to-first-audio depends on the first
+token, not the last.
+
+Used through text_to_speech.speak_stream (threads) or speak_token_stream
+below (tts_engine sessions). Running this file compares both ways of
+speaking an answer against a local stand-in server.
+"""
+import asyncio
+import re
+import threading
+import time
+
+MIN_CHARS = 20           # Shorter segments wait for more text, so speech doesn't sound choppy
+CLAUSE_MIN_CHARS = 60    # A clause boundary (comma, semicolon, ...) only splits this much text
+MAX_CHARS = 250          # Longer text is split at a word boundary even without punctuation
+MAX_WAIT = 0.6           # Seconds text may wait for a boundary before it is spoken anyway
+
+_SENTENCE_END = re.compile(r'[.!?…]+["\'”)\]]*(?=\s)')
+_CLAUSE_END = re.compile(r'[,;:–—](?=\s)')
+
+
+class SentenceSegmenter:
+    """
+    Collects streamed text and cuts it into speakable segments.
+
+    A segment ends at the first sentence end once it has at least
+    `min_chars` characters, or at a clause boundary once it has
+    `clause_min_chars`. Text longer than `max_chars`, or older than
+    `max_wait` seconds, is cut at the last complete word.
+    """
+
+    def __init__(self, min_chars=MIN_CHARS, clause_min_chars=CLAUSE_MIN_CHARS,
+                 max_chars=MAX_CHARS, max_wait=MAX_WAIT):
+        self.min_chars = min_chars
+        self.clause_min_chars = clause_min_chars
+        self.max_chars = max_chars
+        self.max_wait = max_wait
+        self._text = ""
+        self._waiting_since = None   # When the oldest unsent text arrived
+
+    def _cut(self, end, now):
+        segment, self._text = self._text[:end].strip(), self._text[end:].lstrip()
+        self._waiting_since = now if self._text else None
+        return segment
+
+    def feed(self, text, now=None):
+        """
+        Adds streamed text.
+
+        Returns:
+            list: The segments that are now complete (often none).
+        """
+        now = time.monotonic() if now is None else now
+        if self._waiting_since is None and text.strip():
+            self._waiting_since = now
+        self._text += text
+        segments = []
+        while True:
+            end = self._boundary()
+            if end is None:
+                break
+            segments.append(self._cut(end, now))
+        return segments + self.due(now)
+
+    def _boundary(self):
+        text = self._text
+        for match in _SENTENCE_END.finditer(text):
+            if match.end() >= self.min_chars:
+                return match.end()
+        for match in _CLAUSE_END.finditer(text):
+            if match.end() >= self.clause_min_chars:
+                return match.end()
+        if len(text) > self.max_chars:
+            space = text.rfind(" ", 0, self.max_chars)
+            return space if space > 0 else self.max_chars
+        return None
+
+    def time_left(self, now=None):
+        """Seconds until waiting text is due (None when nothing is waiting)."""
+        if self._waiting_since is None:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._waiting_since + self.max_wait - now)
+
+    def due(self, now=None):
+        """Returns the complete words of text that has waited `max_wait` seconds, if any."""
+        now = time.monotonic() if now is None else now
+        if self._waiting_since is None or now - self._waiting_since < self.max_wait:
+            return []
+        space = self._text.rstrip().rfind(" ")
+        if space <= 0:
+            return []  # A single word still being written: wait for it to finish
+        return [self._cut(space, now)]
+
+    def finish(self):
+        """Returns whatever text is left at the end of the stream."""
+        segment, self._text, self._waiting_since = self._text.strip(), "", None
+        return [segment] if segment else []
+
+
+def iter_segments(tokens, **policy):
+    """
+    Cuts a (blocking) token stream into segments.
+
+    The max-wait rule is checked whenever a token arrives; use
+    aiter_segments to also have it fire while waiting for a slow token.
+
+    Args:
+        tokens (iterable): Pieces of text, e.g. from stream_gemini_response.
+        **policy: Passed on to SentenceSegmenter.
+
+    Yields:
+        str: Segments ready to be spoken.
+    """
+    segmenter = SentenceSegmenter(**policy)
+    for token in tokens:
+        yield from segmenter.feed(token)
+    yield from segmenter.finish()
+
+
+async def aiter_segments(tokens, **policy):
+    """
+    Cuts an async token stream into segments, also releasing waiting text
+    after `max_wait` seconds when no new token arrives.
+
+    Args:
+        tokens (async iterable): Pieces of text.
+        **policy: Passed on to SentenceSegmenter.
+
+    Yields:
+        str: Segments ready to be spoken.
+    """
+    segmenter = SentenceSegmenter(**policy)
+    iterator = tokens.__aiter__()
+    next_token = None
+    while True:
+        if next_token is None:
+            next_token = asyncio.ensure_future(iterator.__anext__())
+        done, _ = await asyncio.wait({next_token}, timeout=segmenter.time_left())
+        if not done:
+            for segment in segmenter.due():
+                yield segment
+            continue
+        try:
+            token = next_token.result()
+        except StopAsyncIteration:
+            break
+        next_token = None
+        for segment in segmenter.feed(token):
+            yield segment
+    for segment in segmenter.finish():
+        yield segment
+
+
+async def aiter_in_thread(tokens):
+    """
+    Runs a blocking token generator (e.g. stream_mixtral_response) on a
+    thread and yields its tokens to the event loop as they arrive.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    finished = object()
+
+    def pump():
+        try:
+            for token in tokens:
+                loop.call_soon_threadsafe(queue.put_nowait, token)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+    threading.Thread(target=pump, daemon=True, name="TokenPump").start()
+    while True:
+        token = await queue.get()
+        if token is finished:
+            return
+        yield token
+
+
+async def speak_token_stream(session, tokens, **policy):
+    """
+    Speaks a token stream on a tts_engine session, segment by segment: one
+    Speak and one Flush per segment, so each is synthesized as soon as it
+    is complete.
+
+    Args:
+        session (TTSSession): The session to speak on.
+        tokens (async iterable): Pieces of text; wrap a blocking generator
+            with aiter_in_thread().
+        **policy: Passed on to SentenceSegmenter.
+
+    Returns:
+        dict: "segments", and "first_token_to_first_audio" /
+        "first_token_to_first_segment" in seconds.
+    """
+    first_token_at = None
+
+    async def stamped():
+        nonlocal first_token_at
+        async for token in tokens:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            yield token
+
+    first_segment_at = None
+    segments = 0
+    async for segment in aiter_segments(stamped(), **policy):
+        if first_segment_at is None:
+            first_segment_at = time.perf_counter()
+        await session.send_text(segment)
+        await session.flush()
+        segments += 1
+    await session.wait_done()
+    return {
+        "segments": segments,
+        "first_token_to_first_segment": (first_segment_at - first_token_at) if segments else None,
+        "first_token_to_first_audio": (session.first_audio_at - first_token_at)
+        if segments and session.first_audio_at else None,
+    }
+
+
+if __name__ == "__main__":
+    from tts_engine import TTSEngine
+    from tts_load_test import start_stand_in_server
+
+    ANSWER = ("Kanpur is a large industrial city in Uttar Pradesh. It lies on the south bank "
+              "of the Ganges, about eighty kilometres from Lucknow. Known for its leather and "
+              "textile industries, it is one of the biggest cities in northern India. ") * 2
+
+    async def fake_llm(tokens_per_second=40):
+        # Stands in for a streaming completion: one word at a time
+        for word in ANSWER.split(" "):
+            await asyncio.sleep(1 / tokens_per_second)
+            yield word + " "
+
+    async def main(base_url):
+        async with TTSEngine(base_url=base_url, token=None) as engine:
+            session = await engine.open_session()
+
+            # Before: wait for the whole answer, then speak it
+            tokens = []
+            async for token in fake_llm():
+                if not tokens:
+                    start = time.perf_counter()
+                tokens.append(token)
+            answer = "".join(tokens)
+            await session.speak(answer)
+            await session.wait_done()
+            whole = session.first_audio_at - start
+
+            # After: speak each segment as soon as it is complete
+            result = await speak_token_stream(session, fake_llm())
+            print(f"First token to first audio, whole answer : {whole * 1000:6.0f} ms")
+            print(f"First token to first audio, incremental  : "
+                  f"{result['first_token_to_first_audio'] * 1000:6.0f} ms ({result['segments']} segments)")
+
+    process, base_url = start_stand_in_server()
+    try:
+        asyncio.run(main(base_url))
+    finally:
+        process.terminate()
@@ -1,14 +1,65 @@
 # File: gemini_summarizer.py
 import os
+import re
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
 from dotenv import load_dotenv
+from single_flight import flights, make_key
+from response_cache import make_key as response_key
 
-def summarize_with_gemini(text_to_summarize):
+MODEL_NAME = 'gemini-flash-lite-latest'
+CHARS_PER_TOKEN = 4          # Rough size of one token for English text
+CHUNK_TOKENS = 6000          # Token budget for one chunk sent in the "map" step
+MAX_WORKERS = 8              # Chunks summarized at the same time
+MAX_REDUCE_ROUNDS = 5        # Reduce levels before what is left is cut to fit
+PARTIAL_INSTRUCTION = "in a short paragraph that keeps every key fact"
+CACHE_PATH = ".summary_cache.sqlite3"
+CACHE_MAX_ENTRIES = 10000
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Shared model, configured once and reused by every summary
+_model = None
+_model_lock = threading.Lock()
+
+
+def _get_model():
+    """Returns the shared Gemini model, configuring the API key on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+                _model = genai.GenerativeModel(MODEL_NAME)
+    return _model
+
+
+def _build_prompt(text, instruction="in about 2-3 sentences"):
+    # This is the crucial instruction we give to the AI.
+    # We tell it its role and what to do with the text.
+    return f"""
+        You are an expert summarizer.
+        Please provide a concise, easy-to-read summary of the following text {instruction}.
+
+        --- TEXT ---
+        {text}
+        --- END ---
+        """
+
+
+def summarize_with_gemini(text_to_summarize, response_cache=None):
     """
     Sends text to the Gemini API with a specific prompt to get a summary.
 
     Args:
         text_to_summarize (str): The long text you want to summarize.
+        response_cache (ResponseCache, optional): Answer texts summarized
+            before from earlier responses without calling the API.
 
     Returns:
         str: The AI-generated summary.
@@ -18,27 +69,435 @@ def summarize_with_gemini(text_to_summarize):
     if not API_KEY:
         return "Error: GOOGLE_API_KEY not found. Please check your .env file."
 
+    prompt = _build_prompt(text_to_summarize)
+    if response_cache is not None:
+        cached = response_cache.get(response_key("summary", MODEL_NAME, [prompt]))
+        if cached is not None:
+            return cached
+    # Identical texts summarized at the same time share one API call
+    answer = flights.do(make_key("gemini", MODEL_NAME, prompt), _generate, prompt)
+    return _cache_summary(response_cache, prompt, answer)
+
+
+async def summarize_with_gemini_async(text_to_summarize, response_cache=None):
+    """The asyncio version of summarize_with_gemini."""
+    load_dotenv()
+    if not os.getenv("GOOGLE_API_KEY"):
+        return "Error: GOOGLE_API_KEY not found. Please check your .env file."
+    prompt = _build_prompt(text_to_summarize)
+    if response_cache is not None:
+        cached = response_cache.get(response_key("summary", MODEL_NAME, [prompt]))
+        if cached is not None:
+            return cached
+    answer = await flights.do_async(make_key("gemini", MODEL_NAME, prompt), _generate, prompt)
+    return _cache_summary(response_cache, prompt, answer)
+
+
+def _generate(prompt):
+    """Returns (text, ok): ok is False when text is an error message."""
     try:
-        genai.configure(api_key=API_KEY)
-        model = genai.GenerativeModel('gemini-flash-lite-latest')
+        return _get_model().generate_content(prompt).text, True
 
-        # This is the crucial instruction we give to the AI.
-        # We tell it its role and what to do with the text.
-        prompt = f"""
-        You are an expert summarizer. 
-        Please provide a concise, easy-to-read summary of the following text in about 2-3 sentences.
+    except Exception as e:
+        return f"An error occurred: {e}", False
 
-        --- TEXT ---
-        {text_to_summarize}
-        --- END ---
-        """
 
-        response = model.generate_content(prompt)
-        return response.text
+def _cache_summary(response_cache, prompt, answer):
+    # Every caller sharing a call fills its own cache; error messages are never cached
+    text, ok = answer
+    if ok and response_cache is not None:
+        response_cache.put(response_key("summary", MODEL_NAME, [prompt]), text)
+    return text
+
+
+# --- Long-document (map-reduce) summarization ---
+
+def estimate_tokens(text):
+    """Cheap local estimate of how many tokens a piece of text uses."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def iter_paragraphs(source):
+    """
+    Reads text piece by piece and yields one paragraph at a time, so the
+    whole document never has to be in memory.
+
+    Args:
+        source (str or iterable): A file path, or any iterable of text
+            pieces (e.g. an open file or a generator of lines).
+
+    Yields:
+        str: The next non-empty paragraph (blank lines separate paragraphs).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as f:
+            yield from iter_paragraphs(f)
+        return
+
+    buffer, paragraph = "", []
+    for piece in source:
+        # Only the unfinished last line stays in the buffer
+        *lines, buffer = (buffer + piece).split("\n")
+        for line in lines:
+            if line.strip():
+                paragraph.append(line.strip())
+            elif paragraph:
+                yield " ".join(paragraph)
+                paragraph = []
+    if buffer.strip():
+        paragraph.append(buffer.strip())
+    if paragraph:
+        yield " ".join(paragraph)
+
+
+def _split_oversized(paragraph, max_tokens):
+    """Splits a paragraph that is over budget into runs of whole sentences."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    current = ""
+    for sentence in _SENTENCE_END.split(paragraph):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            yield current
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+        # A single sentence longer than the budget is cut hard
+        while len(current) > max_chars:
+            yield current[:max_chars]
+            current = current[max_chars:]
+    if current:
+        yield current
+
+
+def _is_content_boundary(piece, piece_tokens, max_tokens):
+    """
+    Decides from the text alone whether a chunk may end after this piece.
+    On average a chunk ends every max_tokens / 2 tokens, and since the choice
+    does not depend on what came before, an edit only moves the chunk
+    boundaries next to it.
+    """
+    fraction = int.from_bytes(hashlib.blake2b(piece.encode("utf-8"), digest_size=8).digest(), "big") / 2 ** 64
+    return fraction < 2 * piece_tokens / max_tokens
+
+
+def iter_chunks(source, max_tokens=CHUNK_TOKENS, content_defined=False):
+    """
+    Groups a document into chunks that each fit in `max_tokens`, breaking on
+    paragraph boundaries first and on sentence boundaries when a paragraph
+    alone is too long.
+
+    Args:
+        source (str or iterable): A file path or an iterable of text pieces.
+        max_tokens (int): Token budget per chunk.
+        content_defined (bool): Also end chunks at boundaries picked from the
+            paragraph contents, so a small edit leaves the other chunks
+            byte-for-byte unchanged (used for caching).
+
+    Yields:
+        str: The next chunk of text.
+    """
+    current, current_tokens = [], 0
+    for paragraph in iter_paragraphs(source):
+        pieces = [paragraph]
+        if estimate_tokens(paragraph) > max_tokens:
+            pieces = list(_split_oversized(paragraph, max_tokens))
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece + "\n\n")
+            if current and current_tokens + piece_tokens > max_tokens:
+                yield "\n\n".join(current)
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+            if content_defined and _is_content_boundary(piece, piece_tokens, max_tokens):
+                yield "\n\n".join(current)
+                current, current_tokens = [], 0
+    if current:
+        yield "\n\n".join(current)
+
+
+def _summarize_text(text, instruction):
+    # The same chunk summarized by two documents at once is only sent once
+    prompt = _build_prompt(text, instruction)
+    # Keyed apart from _generate, which returns error messages instead of raising
+    return flights.do(make_key("gemini", MODEL_NAME, prompt, contract="strict"), _generate_strict, prompt)
+
+
+def _generate_strict(prompt):
+    return _get_model().generate_content(prompt).text.strip()
+
+
+class SummaryCache:
+    """
+    A persistent, size-bounded cache of chunk summaries stored in SQLite.
+
+    Entries are keyed by a hash of the model, the instruction and the chunk
+    text. When there are more than `max_entries`, the least recently used
+    entries are evicted.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " key TEXT PRIMARY KEY, summary TEXT NOT NULL, last_used REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(text, instruction, model_name=MODEL_NAME):
+        """Hashes everything that affects a summary into one cache key."""
+        digest = hashlib.sha256()
+        for part in (model_name, instruction, text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Returns the cached summary for `key`, or None on a miss."""
+        with self._lock:
+            row = self._db.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return row[0]
+
+    def put(self, key, summary):
+        """Stores a summary, evicting the least recently used entries if full."""
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)", (key, summary, time.time()))
+            count = self._db.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+            if count > self.max_entries:
+                removed = self._db.execute(
+                    "DELETE FROM summaries WHERE key IN ("
+                    " SELECT key FROM summaries ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,)).rowcount
+                self.evictions += removed
+            self._db.commit()
+
+    def stats(self):
+        """Returns hit/miss counters and the current number of entries."""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+        }
+
+    def close(self):
+        self._db.close()
+
+
+def _summarize_chunks(chunks, instruction, max_workers, cache=None):
+    """
+    Summarizes chunks concurrently, returning summaries in chunk order.
+    With a cache, only chunks that have no cached summary go to the model.
+    """
+    chunks = list(chunks)
+    summaries = [None] * len(chunks)
+    keys = [None] * len(chunks)
+    todo = []
+    for i, chunk in enumerate(chunks):
+        if cache is not None:
+            keys[i] = SummaryCache.make_key(chunk, instruction)
+            summaries[i] = cache.get(keys[i])
+        if summaries[i] is None:
+            todo.append(i)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fresh = executor.map(lambda i: _summarize_text(chunks[i], instruction), todo)
+        for i, summary in zip(todo, fresh):
+            summaries[i] = summary
+            if cache is not None:
+                cache.put(keys[i], summary)
+    return summaries
+
+
+def _group_by_budget(texts, max_tokens):
+    """Packs consecutive texts into groups whose joined size fits the budget."""
+    groups, current, current_tokens = [], [], 0
+    for text in texts:
+        tokens = estimate_tokens(text + "\n\n")
+        if current and current_tokens + tokens > max_tokens:
+            groups.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append("\n\n".join(current))
+    return groups
+
+
+def summarize_long_document(source, max_tokens=CHUNK_TOKENS, max_workers=MAX_WORKERS, cache=None):
+    """
+    Summarizes a document of any length with a map-reduce over Gemini.
+
+    The text is streamed into token-budgeted chunks that are summarized in
+    parallel ("map"). The partial summaries are then grouped and summarized
+    again, level by level, until they fit into a single final call ("reduce").
+    If they still don't fit after MAX_REDUCE_ROUNDS levels, the joined
+    summaries are cut to the budget for the final call.
+
+    Args:
+        source (str or iterable): A file path, or an iterable of text pieces.
+        max_tokens (int): Token budget for the text of any single call.
+        max_workers (int): How many Gemini calls may run at the same time.
+        cache (SummaryCache, optional): Reuse summaries of unchanged chunks
+            from earlier runs; only edited chunks are sent to the model.
+
+    Returns:
+        str: The AI-generated summary, or an error message.
+    """
+    load_dotenv()
+    if not os.getenv("GOOGLE_API_KEY"):
+        return "Error: GOOGLE_API_KEY not found. Please check your .env file."
+
+    try:
+        chunks = iter_chunks(source, max_tokens, content_defined=cache is not None)
+        partials = _summarize_chunks(chunks, PARTIAL_INSTRUCTION, max_workers, cache)
+        if not partials:
+            return ""
+
+        # Reduce level by level until everything fits into one final call
+        rounds = 0
+        while estimate_tokens("\n\n".join(partials)) > max_tokens and rounds < MAX_REDUCE_ROUNDS:
+            rounds += 1
+            groups = _group_by_budget(partials, max_tokens)
+            if len(groups) == len(partials):
+                # Summaries did not shrink enough to combine; cut them down first
+                groups = partials
+            partials = _summarize_chunks(groups, PARTIAL_INSTRUCTION, max_workers, cache)
+
+        # Summaries that never shrank enough are cut down rather than reduced forever
+        combined = "\n\n".join(partials)[:max_tokens * CHARS_PER_TOKEN]
+        return _summarize_text(combined, "in about 2-3 sentences")
 
     except Exception as e:
         return f"An error occurred: {e}"
 
+
+# --- Packed multi-document summarization ---
+
+def _build_packed_prompt(batch):
+    """Builds one prompt holding several numbered documents and a JSON answer contract."""
+    docs = "\n".join(
+        # "<<<" inside a document would look like a delimiter, so soften it
+        f"<<<DOC {doc_id}>>>\n{text.replace('<<<', '< < <')}\n<<<END DOC {doc_id}>>>"
+        for doc_id, text in batch
+    )
+    return f"""
+        You are an expert summarizer.
+        Below are {len(batch)} separate documents, each between <<<DOC id>>> and <<<END DOC id>>> markers.
+        Summarize each document on its own in about 2-3 sentences.
+        Answer with only a JSON array containing one object per document, in the form
+        [{{"id": <document id>, "summary": "<summary>"}}]
+
+        {docs}
+        """
+
+
+def _parse_packed_response(text):
+    """
+    Reads the per-document summaries out of a packed response.
+
+    Returns:
+        dict: Document id -> summary, for every entry that could be parsed.
+    """
+    text = text.strip()
+    # Models sometimes wrap JSON in a ```json code fence
+    text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text)
+    try:
+        entries = json.loads(text)
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(entries, list):
+        return {}
+    summaries = {}
+    for entry in entries:
+        if isinstance(entry, dict) and isinstance(entry.get("summary"), str):
+            try:
+                summaries[int(entry.get("id"))] = entry["summary"].strip()
+            except (TypeError, ValueError):
+                continue
+    return summaries
+
+
+def _summarize_packed(batch):
+    """Summarizes one packed batch, re-sending any document the answer missed."""
+    summaries = {}
+    if len(batch) > 1:
+        try:
+            response = _get_model().generate_content(
+                _build_packed_prompt(batch),
+                generation_config={"response_mime_type": "application/json"})
+            summaries = _parse_packed_response(response.text)
+        except Exception as e:
+            print(f"Packed summary request failed, falling back to single documents: {e}")
+    for doc_id, text in batch:
+        if doc_id not in summaries:
+            try:
+                summaries[doc_id] = _summarize_text(text, "in about 2-3 sentences")
+            except Exception as e:
+                # Only this document failed; the rest of the batch keeps its summaries
+                summaries[doc_id] = f"An error occurred: {e}"
+    return [(doc_id, summaries[doc_id]) for doc_id, _ in batch]
+
+
+def summarize_many(texts, max_tokens=CHUNK_TOKENS, max_workers=MAX_WORKERS):
+    """
+    Summarizes many short documents with as few Gemini calls as possible.
+
+    Documents are packed into prompts of up to `max_tokens` tokens, and the
+    model answers with a JSON list of per-document summaries. Any document
+    whose summary is missing from the answer is summarized on its own.
+
+    Args:
+        texts (iterable): The documents to summarize.
+        max_tokens (int): Token budget for the documents in one packed prompt.
+        max_workers (int): How many Gemini calls may run at the same time.
+
+    Returns:
+        list: One summary (or error message) per document, in input order.
+    """
+    texts = list(texts)
+    load_dotenv()
+    if not os.getenv("GOOGLE_API_KEY"):
+        return ["Error: GOOGLE_API_KEY not found. Please check your .env file."] * len(texts)
+
+    # Pack consecutive documents until the next one would go over budget
+    batches, current, current_tokens = [], [], 0
+    for doc_id, text in enumerate(texts):
+        tokens = estimate_tokens(text) + 20  # Delimiters and JSON overhead
+        if current and current_tokens + tokens > max_tokens:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append((doc_id, text))
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+
+    results = [None] * len(texts)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_summarize_packed, batch) for batch in batches]
+        for batch, future in zip(batches, futures):
+            try:
+                for doc_id, summary in future.result():
+                    results[doc_id] = summary
+            except Exception as e:
+                for doc_id, _ in batch:
+                    results[doc_id] = f"An error occurred: {e}"
+    return results
+
+
 if __name__ == "__main__":
     long_text = """
     Uttar Pradesh, located in the northern part of India, is the most populous state in the country and holds
@@ -56,4 +515,10 @@ if __name__ == "__main__":
     print("\n--- Original Text ---")
     print(long_text)
     print("\n--- Gemini AI Summary ---")
-    print(summary)
\ No newline at end of file
+    print(summary)
+
+    # For book-length files, stream them through the map-reduce mode instead:
+    # print(summarize_long_document("report.txt"))
+    # Add cache=SummaryCache() to only pay for the chunks that changed since the last run.
+    # For many short texts, pack them into as few calls as possible:
+    # print(summarize_many(["first news item...", "second news item..."]))
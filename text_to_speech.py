@@ -5,21 +5,27 @@ and PyAudio for audio playback.
 """
 import os
 import pyaudio
-import queue
 import threading
 import json
 import time
+from urllib.parse import urlparse, parse_qs
 import websockets # Import the main library
 from websockets.exceptions import ConnectionClosedOK, ConnectionClosedError # Import specific exceptions
 from websockets.sync.client import connect
 from dotenv import load_dotenv
+from pcm_buffer import PCMRingBuffer
+from speech_pipeline import iter_segments
+from audio_cache import AudioCache
 # --- Constants ---
 DEFAULT_TOKEN = os.getenv("GOOGLE_API_KEY") # Default Deepgram API token (Consider moving to environment variables or config)
-TIMEOUT = 0.050  # Timeout for queue get operation in seconds
+TIMEOUT = 0.050  # Timeout in seconds used when waiting for WebSocket messages
 FORMAT = pyaudio.paInt16  # Audio format for PyAudio stream
 CHANNELS = 1  # Number of audio channels
 RATE = 48000  # Sample rate for audio
-CHUNK = 8000  # Size of audio chunks for processing and playback
+CHUNK = 8000  # Frames written to the audio stream at a time
+FRAME_BYTES = 2 * CHANNELS  # Bytes per frame (16-bit samples)
+BUFFER_SECONDS = 5  # Audio the playback ring buffer holds before the receiver has to wait
+JITTER_SECONDS = 0.1  # Audio buffered before playback starts, to ride out network jitter
 # Example using aura-asteria-en model
 DEFAULT_URL = f"wss://api.deepgram.com/v1/speak?encoding=linear16&sample_rate={RATE}&model=aura-asteria-en"
 # Default Deepgram WebSocket URL
@@ -29,7 +35,7 @@ DEFAULT_URL = f"wss://api.deepgram.com/v1/speak?encoding=linear16&sample_rate={R
 # Consider encapsulating this logic within a class for better organization.
 
 audio = None               # PyAudio instance (initialized later)
-_queue = queue.Queue()     # Queue to hold audio data chunks for playback
+_buffer = None             # PCMRingBuffer holding audio waiting to be played
 _exit_event = threading.Event() # Event to signal threads to stop gracefully
 _socket = None             # WebSocket connection object
 _stream = None             # PyAudio output stream object
@@ -37,31 +43,52 @@ _playback_thread = None    # Thread for handling audio playback from the queue
 _receiver_thread = None    # Thread for receiving audio data from WebSocket
 
 speak_content = True       # Flag to enable/disable speaking (can be toggled)
+_utterance_started_at = None    # perf_counter() when the current utterance was requested
+last_time_to_first_audio = None # Seconds from the last request (or first token) to its first audio
+audio_cache = None         # Set to an AudioCache to play repeated phrases from disk
+_socket_url = DEFAULT_URL  # URL of the open connection (its voice and audio format)
+_recording = None          # AudioRecorder saving the current utterance into audio_cache
+_recording_lock = threading.Lock()
+_pending_flushes = 0       # Flushes sent whose audio has not fully arrived yet
+# Barge-in: every interruption starts a new generation of the playback buffer.
+# Until Deepgram confirms each Clear with "Cleared", arriving audio is stale.
+_generation_lock = threading.RLock()
+_clears_pending = 0        # Clear messages sent but not yet confirmed
+dropped_stale_bytes = 0    # Audio of interrupted utterances dropped on arrival
+_writing = False           # The playback thread is handing a chunk to the sound card
+_interrupted_at = None     # perf_counter() of the interruption not yet silent
+last_interrupt_to_silence = None  # Seconds from the last interrupt() to silence
 # llm_processing = None      # Placeholder variable (purpose unclear, removed for now)
 
 
 # --- Audio Playback Functions ---
 
-def speaker_play_thread():
+def speaker_play_thread(chunk=CHUNK):
     """
-    Worker thread function that continuously reads audio data from the queue
-    and writes it to the PyAudio output stream for playback.
+    Worker thread function that takes exactly one stream buffer (chunk
+    frames) of audio at a time from the ring buffer and writes it to the
+    PyAudio output stream. It sleeps until audio is available instead of
+    polling.
+
+    Args:
+        chunk (int): Frames per write, matching the stream's frames_per_buffer.
     """
-    global _stream # Access global stream object
+    global _stream, _writing # Access global stream object
     print("Playback thread started.")
+    buffer = _buffer
+    out = bytearray(chunk * FRAME_BYTES)  # Reused for every chunk
     while not _exit_event.is_set():
         try:
-            # Get audio data from the queue with a timeout
-            data = _queue.get(timeout=TIMEOUT)
+            _writing = False
+            _note_silence()
+            if not buffer.read_into(out):
+                break  # The buffer was closed by speaker_stop
+            _writing = True  # A chunk is on its way to the speaker
             if _stream and _stream.is_active(): # Check if stream is valid and active
-                _stream.write(data) # Write data to the audio stream
-            elif _stream is None or not _stream.is_active():
+                # PyAudio only accepts immutable bytes, so this is the one copy per chunk
+                _stream.write(bytes(out)) # Write data to the audio stream
+            else:
                  print("Playback thread: Stream is not active or available.")
-                 # Optionally break or wait for stream to become active again
-                 time.sleep(TIMEOUT) # Wait before checking again
-        except queue.Empty:
-            # Queue is empty, continue waiting for data
-            continue
         except IOError as e:
              print(f"PyAudio stream write error in playback thread: {e}")
              # Decide if the thread should stop on stream errors
@@ -83,7 +110,7 @@ def speaker_start(rate=RATE, chunk=CHUNK, channels=CHANNELS, output_device_index
         channels (int): Number of audio channels.
         output_device_index (int, optional): Index of the desired output device. Defaults to None (system default).
     """
-    global _stream, _playback_thread, audio
+    global _stream, _playback_thread, _buffer, audio
     if _stream:
         print("Speaker already started.")
         return
@@ -104,7 +131,11 @@ def speaker_start(rate=RATE, chunk=CHUNK, channels=CHANNELS, output_device_index
             output_device_index=output_device_index,
         )
         _exit_event.clear() # Reset the exit event
-        _playback_thread = threading.Thread(target=speaker_play_thread, daemon=True, name="SpeakerPlaybackThread")
+        # Allocate all the buffer memory once, up front
+        _buffer = PCMRingBuffer(rate * FRAME_BYTES * BUFFER_SECONDS, FRAME_BYTES,
+                                start_bytes=int(rate * JITTER_SECONDS) * FRAME_BYTES)
+        _playback_thread = threading.Thread(target=speaker_play_thread, args=(chunk,),
+                                            daemon=True, name="SpeakerPlaybackThread")
         _playback_thread.start()
         print("Speaker started successfully.")
     except Exception as e:
@@ -125,6 +156,8 @@ def speaker_stop():
 
     print("Stopping speaker...")
     _exit_event.set() # Signal threads to exit
+    if _buffer:
+        _buffer.close() # Wake the playback thread and any receiver waiting for room
 
     # Wait for the playback thread to finish
     if _playback_thread and _playback_thread.is_alive():
@@ -151,31 +184,35 @@ def speaker_stop():
     print("Speaker stopped.")
 
 
-def speaker_play(data):
+def speaker_play(data, generation=None):
     """
-    Adds audio data chunk to the playback queue.
+    Copies an audio data chunk into the playback buffer. If the buffer is
+    full this waits until the speaker has played enough to make room.
 
     Args:
         data (bytes): The raw audio data chunk.
+        generation (int, optional): The buffer generation the audio belongs
+            to; if the buffer was cleared since, the audio is dropped.
+    """
+    if _buffer:
+        _buffer.write(data, generation=generation)
+
+def speaker_end_utterance():
+    """
+    Tells the speaker no more audio is coming for the current utterance,
+    so the last partial chunk is played instead of waiting to be filled.
     """
-    _queue.put(data)
+    if _buffer:
+        _buffer.end()
 
 def speaker_empty_queue():
     """
-    Clears all items currently in the playback queue.
+    Drops all audio currently waiting to be played.
     """
-    cleared_count = 0
-    while not _queue.empty():
-        try:
-            _queue.get_nowait() # Use get_nowait for non-blocking removal
-            cleared_count += 1
-        except queue.Empty:
-            break
-        except Exception as e:
-            print(f"Error emptying queue: {e}")
-            break
-    if cleared_count > 0:
-        print(f"Speaker queue cleared ({cleared_count} items removed).")
+    if _buffer:
+        cleared = _buffer.clear()
+        if cleared > 0:
+            print(f"Speaker buffer cleared ({cleared} bytes removed).")
 
 
 # --- WebSocket Communication Functions ---
@@ -191,10 +228,11 @@ def connect_socket(url=DEFAULT_URL, token=DEFAULT_TOKEN):
     Returns:
         bool: True if connection was successful, False otherwise.
     """
-    global _socket
+    global _socket, _socket_url
     if _socket:
         print("Socket already connected.")
         return True
+    _socket_url = url
 
     print(f"Connecting to WebSocket: {url}")
     try:
@@ -233,9 +271,10 @@ def send_message(prompt):
     if _socket:
         try:
             # Clear any previous state on Deepgram's side (optional but good practice)
-            _socket.send(json.dumps({"type": "Clear"}))
+            _send_clear()
             print(f"Sending TTS request: '{prompt[:50]}...'") # Log truncated prompt
             # Send the text to be spoken
+            _mark_awaiting_flush()
             _socket.send(json.dumps({"type": "Speak", "text": prompt}))
             # Flush the connection to ensure the message is sent promptly
             _socket.send(json.dumps({"type": "Flush"}))
@@ -249,6 +288,100 @@ def send_message(prompt):
         print("Cannot send message: WebSocket is not connected.")
 
 
+def send_segment(text):
+    """
+    Sends one segment of a longer utterance: a Speak message followed by a
+    Flush, so Deepgram synthesizes it straight away without clearing the
+    segments before it.
+
+    Args:
+        text (str): The segment to be synthesized into speech.
+    """
+    if _socket:
+        try:
+            _mark_awaiting_flush()
+            _socket.send(json.dumps({"type": "Speak", "text": text}))
+            _socket.send(json.dumps({"type": "Flush"}))
+        except ConnectionClosedError as e:
+             print(f"Error sending segment: WebSocket connection closed unexpectedly: {e}")
+             disconnect_socket()
+        except Exception as e:
+            print(f"Error sending segment via WebSocket: {e}")
+    else:
+        print("Cannot send segment: WebSocket is not connected.")
+
+
+def _note_first_audio():
+    """Records the time to first audio of the current utterance."""
+    global _utterance_started_at, last_time_to_first_audio
+    if _utterance_started_at is not None:
+        last_time_to_first_audio = time.perf_counter() - _utterance_started_at
+        _utterance_started_at = None
+
+
+# --- Barge-in ---
+
+def interrupt():
+    """
+    Silences the current utterance at once (barge-in): buffered audio is
+    dropped and, if audio is still on its way, Deepgram is told to Clear.
+    Audio of the interrupted utterance arriving afterwards is dropped by
+    the receiver without being copied. The time until the speaker is
+    silent is left in last_interrupt_to_silence.
+    """
+    global _interrupted_at
+    with _generation_lock:
+        if _writing:
+            _interrupted_at = time.perf_counter()
+        speaker_empty_queue()  # Starts a new buffer generation
+        if _socket and _pending_flushes:
+            _send_clear()
+    _stop_recording()
+
+
+def _send_clear():
+    """Sends Clear; audio arriving until Deepgram confirms it belongs to the old utterance."""
+    global _clears_pending, _pending_flushes
+    with _generation_lock:
+        _clears_pending += 1
+        _pending_flushes = 0  # Their audio is dropped, so no Flushed is awaited
+        try:
+            _socket.send(json.dumps({"type": "Clear"}))
+        except Exception:
+            _clears_pending -= 1
+            raise
+
+
+def _cleared():
+    global _clears_pending
+    with _generation_lock:
+        _clears_pending = max(0, _clears_pending - 1)
+
+
+def _current_generation(message):
+    """
+    Returns the buffer generation a just-received audio message belongs
+    to, or None if it is stale (it was sent before a Clear we are still
+    waiting to be confirmed). Stale audio is only counted, never copied.
+    """
+    global dropped_stale_bytes
+    with _generation_lock:
+        if _clears_pending or _buffer is None:
+            dropped_stale_bytes += len(message)
+            return None
+        return _buffer.generation
+
+
+def _note_silence():
+    """Called by the playback thread between chunks: an interruption is now silent."""
+    global _interrupted_at, last_interrupt_to_silence
+    if _interrupted_at is not None:
+        # The sound card still plays what it already holds
+        output_latency = _stream.get_output_latency() if _stream else 0.0
+        last_interrupt_to_silence = time.perf_counter() - _interrupted_at + output_latency
+        _interrupted_at = None
+
+
 def receive_audio():
     """
     Worker thread function that listens for incoming messages (audio chunks)
@@ -281,6 +414,13 @@ def receive_audio():
                              print(f"Received Metadata: {data}")
                         elif msg_type == 'SpeechEnded':
                              print("Received SpeechEnded signal.")
+                        elif msg_type == 'Cleared':
+                             _cleared()
+                        elif msg_type == 'Flushed':
+                             # All audio for the flushed text has arrived (unless it was interrupted)
+                             if not _clears_pending:
+                                 _flushed()
+                                 speaker_end_utterance()
                         elif msg_type == 'Error':
                              print(f"Received Error from Deepgram: {data.get('description', 'Unknown error')}")
                         else:
@@ -289,7 +429,11 @@ def receive_audio():
                          print(f"Received non-JSON text message: {message}")
                 elif isinstance(message, bytes):
                     # Handle binary audio data
-                    speaker_play(message)
+                    generation = _current_generation(message)
+                    if generation is not None:
+                        _note_first_audio()
+                        _record(message)
+                        speaker_play(message, generation)
                 else:
                     print(f"Received unexpected message type: {type(message)}")
 
@@ -326,23 +470,191 @@ def speak(prompt):
     High-level function to make the system speak the given text.
     Clears the audio queue and sends the text to Deepgram for TTS.
 
+    If audio_cache is set, text that was spoken before is played from the
+    cache without going to Deepgram, and new text is saved into it.
+
     Args:
         prompt (str): The text to speak.
     """
     global speak_content
+    if not speak_content:
+        print("Speaking is disabled.")
+        return
+
+    if audio_cache is not None:
+        cached = audio_cache.get(_voice_key(prompt))
+        if cached is not None:
+            print("-" * 20)
+            print(f"Speak request (from audio cache): '{prompt[:50]}...'")
+            interrupt()
+            _start_utterance()
+            threading.Thread(target=_play_cached, args=(cached, _buffer and _buffer.generation),
+                             daemon=True, name="CachedAudioThread").start()
+            return
+
     if not _socket:
          print("Cannot speak: TTS not initialized or connection lost.")
          # Optionally try to re-initialize here
          # if not initialize_tts(): return # Exit if re-init fails
          return
 
-    if speak_content:
-        print("-" * 20)
-        print(f"Speak request: '{prompt[:50]}...'")
-        speaker_empty_queue()  # Ensure the queue is cleared before starting new audio
-        send_message(prompt)
-    else:
+    print("-" * 20)
+    print(f"Speak request: '{prompt[:50]}...'")
+    interrupt()  # Stop whatever is still playing before starting new audio
+    _start_utterance()
+    if audio_cache is not None:
+        _start_recording(prompt)
+    send_message(prompt)
+
+
+# --- Audio cache ---
+
+def _voice_key(text, url=None):
+    """Cache key of text spoken with the voice and audio format of a connection URL."""
+    query = parse_qs(urlparse(url or _socket_url).query)
+    return AudioCache.make_key(text, query.get("model", [""])[0],
+                               query.get("encoding", ["linear16"])[0],
+                               int(query.get("sample_rate", [RATE])[0]))
+
+
+def _play_cached(audio_data, generation):
+    """Feeds cached audio (a memory-mapped file) straight into the playback buffer."""
+    if _stream is None:
+        speaker_start()
+        generation = _buffer.generation
+    _note_first_audio()
+    speaker_play(audio_data, generation)
+    speaker_end_utterance()
+
+
+def _mark_awaiting_flush():
+    """Counts a Flush about to be sent; speak_stream sends one per segment."""
+    global _pending_flushes
+    with _generation_lock:
+        _pending_flushes += 1
+
+
+def _start_recording(prompt):
+    global _recording
+    with _recording_lock:
+        _recording = audio_cache.recorder(_voice_key(prompt))
+
+
+def _stop_recording():
+    """Throws away a recording that was interrupted before it finished."""
+    global _recording
+    with _recording_lock:
+        if _recording is not None:
+            _recording.abort()
+            _recording = None
+
+
+def _record(data):
+    with _recording_lock:
+        if _recording is not None:
+            _recording.write(data)
+
+
+def _flushed():
+    """Called when Deepgram has sent all audio for the text: the recording is complete."""
+    global _recording, _pending_flushes
+    with _generation_lock:
+        _pending_flushes = max(0, _pending_flushes - 1)
+        if _pending_flushes:
+            return  # Later segments are still streaming in
+    with _recording_lock:
+        if _recording is not None:
+            _recording.commit()
+            _recording = None
+
+
+def prewarm_audio_cache(phrases, cache=None, url=DEFAULT_URL, token=DEFAULT_TOKEN):
+    """
+    Synthesizes phrases into the audio cache ahead of time, over a separate
+    connection so nothing is played. Phrases already cached are skipped.
+
+    Args:
+        phrases (iterable): The texts to synthesize (greetings, prompts, ...).
+        cache (AudioCache, optional): Defaults to audio_cache, or a new AudioCache.
+        url (str): WebSocket URL with the voice and audio format speak() will use.
+        token (str): The Deepgram API token.
+
+    Returns:
+        int: How many phrases were synthesized.
+    """
+    global audio_cache
+    if cache is None:
+        if audio_cache is None:
+            audio_cache = AudioCache()
+        cache = audio_cache
+    todo = [p for p in dict.fromkeys(phrases) if p.strip() and not cache.contains(_voice_key(p, url))]
+    if not todo:
+        return 0
+
+    synthesized = 0
+    with connect(url, additional_headers={"Authorization": f"Token {token}"}) as ws:
+        for phrase in todo:
+            recording = cache.recorder(_voice_key(phrase, url))
+            try:
+                ws.send(json.dumps({"type": "Speak", "text": phrase}))
+                ws.send(json.dumps({"type": "Flush"}))
+                while True:
+                    message = ws.recv(timeout=30)
+                    if isinstance(message, bytes):
+                        recording.write(message)
+                    elif json.loads(message).get("type") == "Flushed":
+                        break
+                recording.commit()
+                synthesized += 1
+            except Exception as e:
+                recording.abort()
+                print(f"Could not pre-warm '{phrase[:50]}': {e}")
+    return synthesized
+
+
+def _start_utterance():
+    global _utterance_started_at, last_time_to_first_audio
+    _utterance_started_at = time.perf_counter()
+    last_time_to_first_audio = None
+
+
+def speak_stream(tokens, **policy):
+    """
+    Speaks text while it is still being generated, e.g.
+    speak_stream(stream_gemini_response(prompt)).
+
+    The tokens are cut into sentences and clauses (see speech_pipeline.py)
+    and each segment is sent as soon as it is complete, so speech starts
+    after the first sentence instead of after the whole answer. The time
+    from the first token to the first audio is left in
+    last_time_to_first_audio.
+
+    Args:
+        tokens (iterable): Pieces of text as they are generated.
+        **policy: Segmenting options (min_chars, clause_min_chars, max_chars,
+            max_wait), see speech_pipeline.SentenceSegmenter.
+    """
+    if not _socket:
+         print("Cannot speak: TTS not initialized or connection lost.")
+         return
+    if not speak_content:
         print("Speaking is disabled.")
+        return
+
+    def stamped(tokens):
+        started = False
+        for token in tokens:
+            if not started:
+                # Interrupt whatever was playing first, so its audio can't stop the timer
+                interrupt()
+                # Measure from the first token, not from when the answer is complete
+                _start_utterance()
+                started = True
+            yield token
+
+    for segment in iter_segments(stamped(tokens), **policy):
+        print(f"Speaking segment: '{segment[:50]}...'")
+        send_segment(segment)
 
 def initialize_tts():
     """
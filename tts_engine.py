@@ -0,0 +1,315 @@
+# File: tts_engine.py
+"""
+An asyncio text-to-speech engine for Deepgram's WebSocket speak API.
+
+Where text_to_speech.py runs a single voice with two threads and module
+globals, this runs any number of independent sessions in one event loop.
+Each TTSSession has its own connection, voice/model, audio sink and
+cancellation, and costs one small asyncio task instead of two threads.
+
+Example:
+    async with TTSEngine() as engine:
+        session = await engine.open_session(model="aura-luna-en", sink=SpeakerSink())
+        await session.speak("Hello there!")
+        await session.wait_done()
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+from dotenv import load_dotenv
+
+from pcm_buffer import PCMRingBuffer
+
+load_dotenv()
+
+DEFAULT_TOKEN = os.getenv("DEEPGRAM_API_KEY")
+BASE_URL = "wss://api.deepgram.com/v1/speak"
+DEFAULT_MODEL = "aura-asteria-en"
+ENCODING = "linear16"
+RATE = 48000
+CHUNK = 8000            # Frames per write to the sound card (SpeakerSink)
+BUFFER_SECONDS = 5      # Audio a SpeakerSink holds before the session has to wait
+JITTER_SECONDS = 0.1    # Audio a SpeakerSink buffers before it starts playing
+
+
+def speak_url(model=DEFAULT_MODEL, encoding=ENCODING, sample_rate=RATE, base_url=BASE_URL):
+    """Builds the WebSocket URL for one voice/model and audio format."""
+    return f"{base_url}?encoding={encoding}&sample_rate={sample_rate}&model={model}"
+
+
+# --- Audio sinks: where a session's audio goes ---
+
+class CountingSink:
+    """Keeps no audio, only counts it. Useful for tests and load tests."""
+
+    def __init__(self):
+        self.bytes = 0
+
+    async def write(self, data):
+        self.bytes += len(data)
+
+    def end(self):
+        pass
+
+    def clear(self):
+        pass
+
+
+class SpeakerSink:
+    """
+    Plays a session's audio on a local output device through PyAudio, from
+    its own preallocated PCMRingBuffer and playback thread.
+
+    Args:
+        sample_rate (int): Must match the session's sample rate.
+        chunk (int): Frames per write to the device.
+        output_device_index (int, optional): PyAudio output device (default: system default).
+    """
+
+    def __init__(self, sample_rate=RATE, chunk=CHUNK, output_device_index=None):
+        import pyaudio  # Only sessions that play locally need PyAudio
+        self.chunk = chunk
+        self.buffer = PCMRingBuffer(sample_rate * 2 * BUFFER_SECONDS, 2,
+                                    start_bytes=int(sample_rate * JITTER_SECONDS) * 2)
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=pyaudio.paInt16, channels=1, rate=sample_rate,
+                                        output=True, frames_per_buffer=chunk,
+                                        output_device_index=output_device_index)
+        self._writing = False          # A chunk is on its way to the device
+        self._cleared_at = None        # perf_counter() of a clear() not yet silent
+        self.last_clear_to_silence = None  # Seconds from the last clear() to silence
+        self._thread = threading.Thread(target=self._play, daemon=True, name="SpeakerSinkPlayback")
+        self._thread.start()
+
+    def _play(self):
+        out = bytearray(self.chunk * 2)  # Reused for every chunk
+        while True:
+            self._writing = False
+            if self._cleared_at is not None:
+                # The device still plays what it already holds
+                self.last_clear_to_silence = (time.perf_counter() - self._cleared_at
+                                              + self._stream.get_output_latency())
+                self._cleared_at = None
+            if not self.buffer.read_into(out):
+                break
+            self._writing = True
+            try:
+                self._stream.write(bytes(out))
+            except IOError as e:
+                print(f"PyAudio stream write error: {e}")
+                break
+
+    async def write(self, data):
+        # Taken first, so a clear() while waiting for room drops the rest
+        generation = self.buffer.generation
+        # Fast path: there is room, so copy without leaving the event loop
+        written = self.buffer.write(data, timeout=0, generation=generation)
+        if written < len(data):
+            # Full: wait for the speaker in a worker thread (backpressure)
+            await asyncio.to_thread(self.buffer.write, memoryview(data)[written:],
+                                    generation=generation)
+
+    def end(self):
+        self.buffer.end()
+
+    def clear(self):
+        if self._writing:
+            self._cleared_at = time.perf_counter()
+        self.buffer.clear()
+
+    def close(self):
+        self.buffer.close()
+        self._thread.join(timeout=1.0)
+        self._stream.close()
+        self._audio.terminate()
+
+
+# --- Sessions ---
+
+class TTSSession:
+    """
+    One conversation's voice: a WebSocket connection plus a receiver task
+    feeding its audio sink.
+
+    Args:
+        url (str): WebSocket URL, see speak_url().
+        token (str): Deepgram API token.
+        sink (optional): Where audio goes (CountingSink, SpeakerSink or any
+            object with async write(data), end() and clear()). Defaults to
+            a CountingSink.
+        name (str, optional): Used in log messages.
+    """
+
+    def __init__(self, url, token=DEFAULT_TOKEN, sink=None, name=None):
+        self.url = url
+        self.token = token
+        self.sink = sink if sink is not None else CountingSink()
+        self.name = name or url
+        self._ws = None
+        self._receiver = None
+        self._done = asyncio.Event()      # Set when everything sent has been spoken
+        self._done.set()
+        self._pending_flushes = 0         # Flushes the server has not answered yet
+        self._unflushed = False           # Text sent since the last flush
+        self._sent_at = None              # When the current utterance was sent
+        self.first_audio_latencies = []   # Seconds from speak() to the first audio bytes
+        self.first_audio_at = None        # perf_counter() when the last utterance's audio began
+        self.audio_bytes = 0
+        self._clears_pending = 0          # Clear messages the server has not confirmed yet
+        self.dropped_stale_bytes = 0      # Audio of cancelled utterances dropped on arrival
+
+    async def start(self):
+        """Connects and starts receiving audio."""
+        headers = {"Authorization": f"Token {self.token}"} if self.token else None
+        self._ws = await connect(self.url, additional_headers=headers, max_queue=64)
+        self._receiver = asyncio.create_task(self._receive(), name=f"TTSReceiver {self.name}")
+        return self
+
+    async def _receive(self):
+        try:
+            async for message in self._ws:
+                if isinstance(message, bytes):
+                    if self._clears_pending:
+                        # Sent before our Clear: it belongs to a cancelled utterance
+                        self.dropped_stale_bytes += len(message)
+                        continue
+                    if self._sent_at is not None:
+                        self.first_audio_at = time.perf_counter()
+                        self.first_audio_latencies.append(self.first_audio_at - self._sent_at)
+                        self._sent_at = None
+                    self.audio_bytes += len(message)
+                    await self.sink.write(message)
+                    continue
+                try:
+                    data = json.loads(message)
+                except json.JSONDecodeError:
+                    print(f"[{self.name}] Received non-JSON text message: {message}")
+                    continue
+                msg_type = data.get("type")
+                if msg_type == "Cleared":
+                    self._clears_pending = max(0, self._clears_pending - 1)
+                elif msg_type == "Flushed" and not self._clears_pending:
+                    self._pending_flushes = max(0, self._pending_flushes - 1)
+                    if not self._pending_flushes and not self._unflushed:
+                        self.sink.end()
+                        self._done.set()
+                elif msg_type == "Error":
+                    print(f"[{self.name}] Received Error from Deepgram: {data.get('description', 'Unknown error')}")
+        except ConnectionClosed as e:
+            print(f"[{self.name}] WebSocket connection closed: {e}")
+        finally:
+            # Nobody should wait forever on a session that can't finish
+            self._done.set()
+
+    async def send_text(self, text):
+        """Queues text to be spoken; audio starts after the next flush()."""
+        if self._sent_at is None and self._done.is_set():
+            self._sent_at = time.perf_counter()
+        self._done.clear()
+        self._unflushed = True
+        await self._ws.send(json.dumps({"type": "Speak", "text": text}))
+
+    async def flush(self):
+        """Asks the server to synthesize everything sent so far."""
+        self._unflushed = False
+        self._pending_flushes += 1
+        await self._ws.send(json.dumps({"type": "Flush"}))
+
+    async def speak(self, text):
+        """Sends text and flushes it, so it is spoken straight away."""
+        await self.send_text(text)
+        await self.flush()
+
+    async def wait_done(self, timeout=None):
+        """Waits until all flushed text has been received."""
+        await asyncio.wait_for(self._done.wait(), timeout)
+
+    async def cancel(self):
+        """
+        Stops the current utterance (barge-in): the sink drops its audio, the
+        server is told to Clear, and audio of the cancelled utterance still
+        arriving before the server confirms is dropped without being copied.
+        """
+        self.sink.clear()
+        self._sent_at = None
+        self._pending_flushes = 0
+        self._unflushed = False
+        self._done.set()
+        if self._ws is not None:
+            self._clears_pending += 1
+            await self._ws.send(json.dumps({"type": "Clear"}))
+
+    async def close(self):
+        """Closes the connection and stops the receiver task."""
+        if self._ws is not None:
+            try:
+                await self._ws.send(json.dumps({"type": "Close"}))
+            except ConnectionClosed:
+                pass
+            await self._ws.close()
+        if self._receiver is not None:
+            self._receiver.cancel()
+            try:
+                await self._receiver
+            except asyncio.CancelledError:
+                pass
+        if hasattr(self.sink, "close"):
+            self.sink.close()
+
+
+class TTSEngine:
+    """
+    Opens and tracks many TTSSessions that share one event loop.
+
+    Args:
+        base_url (str): Deepgram speak endpoint (or a local stand-in).
+        token (str): Deepgram API token used by every session.
+    """
+
+    def __init__(self, base_url=BASE_URL, token=DEFAULT_TOKEN):
+        self.base_url = base_url
+        self.token = token
+        self.sessions = set()
+
+    async def open_session(self, model=DEFAULT_MODEL, encoding=ENCODING, sample_rate=RATE,
+                           sink=None, name=None):
+        """Connects a new session with its own voice/model and audio sink."""
+        session = TTSSession(speak_url(model, encoding, sample_rate, self.base_url),
+                             self.token, sink=sink, name=name or model)
+        await session.start()
+        self.sessions.add(session)
+        return session
+
+    async def close_session(self, session):
+        self.sessions.discard(session)
+        await session.close()
+
+    async def close(self):
+        """Closes every open session."""
+        sessions, self.sessions = list(self.sessions), set()
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+if __name__ == "__main__":
+    async def main():
+        # Two voices talking over each other from one event loop
+        async with TTSEngine() as engine:
+            first = await engine.open_session(model="aura-asteria-en", sink=SpeakerSink())
+            second = await engine.open_session(model="aura-orion-en", sink=SpeakerSink())
+            await first.speak("Hello! I am the first voice.")
+            await second.speak("And I am the second voice, speaking at the same time.")
+            await asyncio.gather(first.wait_done(30), second.wait_done(30))
+            await asyncio.sleep(3)  # Let the speakers finish playing
+
+    asyncio.run(main())
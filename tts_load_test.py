@@ -0,0 +1,193 @@
+# File: tts_load_test.py
+"""
+Load test for tts_engine.py against a local stand-in for Deepgram's
+WebSocket speak API, to see how many concurrent sessions one core can
+sustain.
+
+The stand-in runs in its own process, so the CPU time measured here is
+the engine's alone. It answers Speak/Flush/Clear/Close like Deepgram: on
+each Flush it streams silent linear16 audio for the text (about 60 ms of
+speech per character) in 100 ms frames, faster than real time, followed
+by a Flushed message. A Clear takes effect after a short delay, like
+audio already in flight on a real connection, and is confirmed with Cleared.
+
+Usage:
+    python tts_load_test.py [session counts...]     (default: 1 10 50 100 200)
+"""
+import asyncio
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+from urllib.parse import urlparse, parse_qs
+
+from websockets.asyncio.server import serve
+
+from tts_engine import TTSEngine
+
+SECONDS_PER_CHAR = 0.06     # Speech generated per character of text
+FRAME_SECONDS = 0.1         # Audio per binary message
+SPEEDUP = 4.0               # How much faster than real time audio is streamed
+FIRST_AUDIO_DELAY = 0.05    # Stand-in "synthesis" time before the first frame
+CLEAR_DELAY = 0.1           # Audio keeps coming this long after a Clear (already in flight)
+TEXT = "This is a sentence of about the length a voice assistant usually speaks."
+UTTERANCES = 3              # Utterances each session speaks in a run
+
+
+# --- The stand-in server ---
+
+async def _stand_in_session(ws):
+    query = parse_qs(urlparse(ws.request.path).query)
+    sample_rate = int(query.get("sample_rate", ["48000"])[0])
+    frame = bytes(int(sample_rate * FRAME_SECONDS) * 2)  # Silence, shared by every message
+    jobs = asyncio.Queue()
+    pending = []
+
+    async def synthesize():
+        while True:
+            text = await jobs.get()
+            await asyncio.sleep(FIRST_AUDIO_DELAY)
+            frames = max(1, round(len(text) * SECONDS_PER_CHAR / FRAME_SECONDS))
+            for _ in range(frames):
+                await ws.send(frame)
+                await asyncio.sleep(FRAME_SECONDS / SPEEDUP)
+            await ws.send(json.dumps({"type": "Flushed"}))
+
+    worker = asyncio.create_task(synthesize())
+    try:
+        async for message in ws:
+            data = json.loads(message)
+            kind = data.get("type")
+            if kind == "Speak":
+                pending.append(data.get("text", ""))
+            elif kind == "Flush":
+                jobs.put_nowait(" ".join(pending))
+                pending.clear()
+            elif kind == "Clear":
+                # Drop queued and in-progress audio, after what was already on its way
+                await asyncio.sleep(CLEAR_DELAY)
+                worker.cancel()
+                pending.clear()
+                jobs = asyncio.Queue()
+                worker = asyncio.create_task(synthesize())
+                await ws.send(json.dumps({"type": "Cleared"}))
+            elif kind == "Close":
+                break
+    finally:
+        worker.cancel()
+
+
+def _run_stand_in(port_queue):
+    async def main():
+        async with serve(_stand_in_session, "127.0.0.1", 0, max_size=None) as server:
+            port_queue.put(server.sockets[0].getsockname()[1])
+            await asyncio.Future()
+    asyncio.run(main())
+
+
+def start_stand_in_server():
+    """
+    Starts the stand-in in a separate process.
+
+    Returns:
+        tuple: (multiprocessing.Process, base URL). Call terminate() on the process when done.
+    """
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_stand_in, args=(port_queue,), daemon=True)
+    process.start()
+    return process, f"ws://127.0.0.1:{port_queue.get(timeout=10)}/v1/speak"
+
+
+# --- The load test ---
+
+async def run_sessions(base_url, count, utterances=UTTERANCES, text=TEXT):
+    """
+    Runs `count` sessions at once, each speaking `utterances` times.
+
+    Returns:
+        dict: Wall and CPU time, audio received and time-to-first-audio figures.
+    """
+    async with TTSEngine(base_url=base_url, token=None) as engine:
+        sessions = await asyncio.gather(*(engine.open_session(name=f"session {i}") for i in range(count)))
+
+        async def talk(session):
+            for _ in range(utterances):
+                await session.speak(text)
+                await session.wait_done(timeout=120)
+
+        cpu, wall = time.process_time(), time.perf_counter()
+        await asyncio.gather(*(talk(s) for s in sessions))
+        cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+
+    audio_seconds = sum(s.audio_bytes for s in sessions) / (48000 * 2)
+    latencies = sorted(l for s in sessions for l in s.first_audio_latencies)
+    return {
+        "sessions": count,
+        "wall": wall,
+        "cpu": cpu,
+        "audio_seconds": audio_seconds,
+        "ttfa_p50": statistics.median(latencies),
+        "ttfa_p95": latencies[int(len(latencies) * 0.95) - 1 if len(latencies) > 1 else 0],
+        # Each real-time session needs one second of audio handled per second
+        "sessions_per_core": audio_seconds / cpu if cpu else float("inf"),
+    }
+
+
+async def run_barge_in(base_url, count, text=TEXT):
+    """
+    Each session starts a long answer, is interrupted as soon as its audio
+    starts, and speaks a short one instead. Checks that no audio of the
+    interrupted answers reaches the sinks after cancel().
+
+    Returns:
+        dict: Stale bytes dropped and leaked, and cancel-to-new-audio latency.
+    """
+    frame_bytes = int(48000 * FRAME_SECONDS) * 2
+    expected = max(1, round(len(text) * SECONDS_PER_CHAR / FRAME_SECONDS)) * frame_bytes
+    async with TTSEngine(base_url=base_url, token=None) as engine:
+        sessions = await asyncio.gather(*(engine.open_session(name=f"session {i}") for i in range(count)))
+
+        async def barge_in(session):
+            await session.speak(text * 10)
+            while not session.audio_bytes:
+                await asyncio.sleep(0.005)
+            await session.cancel()
+            before, start = session.sink.bytes, time.perf_counter()
+            await session.speak(text)
+            await session.wait_done(timeout=120)
+            # Anything beyond the new answer's audio leaked from the old one
+            return session.sink.bytes - before - expected, session.first_audio_at - start
+
+        results = await asyncio.gather(*(barge_in(s) for s in sessions))
+    latencies = sorted(latency for _, latency in results)
+    return {
+        "sessions": count,
+        "dropped": sum(s.dropped_stale_bytes for s in sessions),
+        "leaked": sum(leaked for leaked, _ in results),
+        "new_audio_p50": statistics.median(latencies),
+    }
+
+
+def main(counts):
+    process, base_url = start_stand_in_server()
+    try:
+        print(f"Stand-in server at {base_url}")
+        print(f"{'sessions':>8} {'wall s':>7} {'cpu s':>6} {'audio s':>8} "
+              f"{'TTFA p50':>9} {'TTFA p95':>9} {'real-time sessions/core':>24}")
+        for count in counts:
+            r = asyncio.run(run_sessions(base_url, count))
+            print(f"{r['sessions']:>8} {r['wall']:>7.2f} {r['cpu']:>6.2f} {r['audio_seconds']:>8.0f} "
+                  f"{r['ttfa_p50'] * 1000:>7.0f}ms {r['ttfa_p95'] * 1000:>7.0f}ms {r['sessions_per_core']:>24.0f}")
+
+        print("\nBarge-in: interrupt each session as its audio starts, then speak again")
+        print(f"{'sessions':>8} {'stale bytes dropped':>20} {'stale bytes played':>19} {'new audio p50':>14}")
+        for count in counts:
+            r = asyncio.run(run_barge_in(base_url, count))
+            print(f"{r['sessions']:>8} {r['dropped']:>20} {r['leaked']:>19} {r['new_audio_p50'] * 1000:>12.0f}ms")
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1, 10, 50, 100, 200])
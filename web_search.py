@@ -1,25 +1,76 @@
 from groq import Groq
+from groq.types.chat import ChatCompletionMessage
 from dotenv import load_dotenv
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
 import os
+import threading
+from response_cache import make_key as response_key
 load_dotenv()
 
 groq_api_key = os.getenv("GROQ_API_KEY")
-client = Groq(api_key=groq_api_key) #
-def get_groq_model_compound_beta(input_text):
+MODEL_NAME = "compound-beta"
+
+# What one query produced: the answer text plus the tool metadata that came with it
+GroqResult = namedtuple("GroqResult", ["query", "content", "tool_calls", "executed_tools", "error"])
+
+# The client is created on first use, so importing this module stays cheap
+_client = None
+_client_lock = threading.Lock()
+
+# Queries currently being answered, so identical concurrent queries share one request
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def get_client():
+    """Returns the shared Groq client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = Groq(api_key=groq_api_key)
+    return _client
+
+
+def _from_cache(cached):
     """
-    Generates a response using Groq's compound-beta model (non-streaming).
-    Note: This function currently prints the response but returns an empty string.
+    Rebuilds a GroqResult stored in a ResponseCache. The cache holds JSON, so
+    tool calls come back as dicts; they are validated into the same SDK
+    objects a fresh call returns.
+    """
+    message = ChatCompletionMessage.model_validate({
+        "role": "assistant",
+        "content": cached["content"],
+        "tool_calls": cached["tool_calls"],
+        "executed_tools": cached["executed_tools"],
+    })
+    return GroqResult(cached["query"], cached["content"], message.tool_calls,
+                      getattr(message, "executed_tools", None), cached["error"])
+
+
+def search(input_text, response_cache=None):
+    """
+    Sends one prompt to Groq's compound-beta model (non-streaming).
 
     Args:
         input_text (str): The input prompt for the model.
+        response_cache (ResponseCache, optional): Answer repeat prompts from
+            earlier results without calling the API. Web answers go stale, so
+            give the "groq" namespace a short TTL.
 
     Returns:
-        str: An empty string (consider returning the actual response).
+        GroqResult: The response content and tool metadata, or the error.
     """
-    print("\n--- Groq Compound Beta ---")
+    key = response_key("groq", MODEL_NAME, [input_text])
+    if response_cache is not None:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return _from_cache(cached)
+
     try:
-        completion = client.chat.completions.create(
-            model="compound-beta",
+        completion = get_client().chat.completions.create(
+            model=MODEL_NAME,
             messages=[
                 {
                     "role": "user",
@@ -28,24 +79,74 @@ def get_groq_model_compound_beta(input_text):
             ],
             # Add other parameters like temperature, max_tokens if needed
         )
+        message = completion.choices[0].message
+        result = GroqResult(input_text, message.content, message.tool_calls,
+                            getattr(message, "executed_tools", None), None)
+        if response_cache is not None:
+            response_cache.put(key, result._asdict())
+        return result
 
-        response_content = completion.choices[0].message.content
-        tool_calls = completion.choices[0].message.tool_calls
+    except Exception as e:
+        return GroqResult(input_text, "", None, None, str(e))
 
-        print("Response Content:", response_content)
-        # Print all tool calls if any
-        if tool_calls:
-            print("Tool Calls:", tool_calls)
-        else:
-            print("No Tool Calls.")
 
-        # Consider returning the actual content or handling tool calls
-        # return response_content
-        return response_content 
+def get_groq_model_compound_beta(input_text, response_cache=None):
+    """
+    Generates a response using Groq's compound-beta model (non-streaming).
+
+    Args:
+        input_text (str): The input prompt for the model.
+        response_cache (ResponseCache, optional): See search().
+
+    Returns:
+        str: The response content, or an empty string on error.
+    """
+    result = search(input_text, response_cache)
+    if result.error:
+        print(f"\nError calling Groq API (Compound Beta): {result.error}")
+    return result.content
+
+
+def _submit_deduplicated(pool, query):
+    """
+    Submits a query to the pool, unless the same query is already running
+    (from this call or another thread), in which case its Future is shared.
+    """
+    with _in_flight_lock:
+        future = _in_flight.get(query)
+        if future is not None:
+            return future
+        future = pool.submit(search, query)
+        _in_flight[query] = future
+
+    def forget(done, query=query):
+        with _in_flight_lock:
+            if _in_flight.get(query) is done:
+                del _in_flight[query]
+
+    future.add_done_callback(forget)
+    return future
+
+
+def search_many(queries, max_workers=8):
+    """
+    Runs many queries concurrently on a bounded pool of threads.
+
+    Identical queries are only sent once while one is in flight, and every
+    caller asking for it gets the same result.
+
+    Args:
+        queries (iterable): The prompts to send.
+        max_workers (int): Most requests in flight at once.
+
+    Returns:
+        list: One GroqResult per query, in the same order as the queries.
+    """
+    queries = list(queries)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="GroqSearch") as pool:
+        futures = [_submit_deduplicated(pool, query) for query in queries]
+        return [future.result() for future in futures]
 
-    except Exception as e:
-        print(f"\nError calling Groq API (Compound Beta): {e}")
-        return ""
 
 if __name__ == "__main__":
     while True:
@@ -54,8 +155,13 @@ if __name__ == "__main__":
             print("Exiting...")
             break
         elif user_input:
-            response = get_groq_model_compound_beta(user_input)
+            result = search(user_input)
             print("\n--- Groq Response ---")
-            print(response)
+            if result.error:
+                print(f"Error calling Groq API (Compound Beta): {result.error}")
+            else:
+                print(result.content)
+                if result.tool_calls or result.executed_tools:
+                    print("Tool Calls:", result.tool_calls or result.executed_tools)
         else:
-            print("No input provided.")
\ No newline at end of file
+            print("No input provided.")
@@ -0,0 +1,253 @@
+# File: wiki_index.py
+"""
+Builds and queries a local index of Wikipedia first paragraphs, so
+information_finder.get_web_information can answer without the network.
+
+The index is built from a Wikipedia dump (https://dumps.wikimedia.org/),
+streamed straight from the compressed file:
+  * an abstract dump (enwiki-latest-abstract.xml.gz), or
+  * an articles dump (enwiki-latest-pages-articles.xml.bz2), which also
+    provides redirects.
+
+Usage:
+    python wiki_index.py <dump file> [index file]
+"""
+import bz2
+import difflib
+import gzip
+import math
+import os
+import re
+import sqlite3
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+INDEX_PATH = os.getenv("WIKI_INDEX_PATH", "wiki_index.sqlite3")
+BATCH_ROWS = 10_000       # Rows written per transaction while building
+FUZZY_CUTOFF = 0.8        # Minimum similarity for a fuzzy title match
+MIN_TRIGRAM_SHARE = 0.5   # Share of the query's trigrams a fuzzy candidate must contain
+MAX_REDIRECT_HOPS = 5
+
+
+def normalize_title(title):
+    """Lookup key for a title: underscores as spaces, single spaces, case-insensitive."""
+    return " ".join(title.replace("_", " ").split()).casefold()
+
+
+# --- Reading dumps ---
+
+def _open_dump(path):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+_TEMPLATE = re.compile(r"\{\{[^{}]*\}\}")
+_TABLE = re.compile(r"\{\|.*?\|\}", re.S)
+_REF = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.S)
+_COMMENT = re.compile(r"<!--.*?-->", re.S)
+_TAG = re.compile(r"<[^>]+>")
+_FILE_LINK = re.compile(r"\[\[(?:File|Image|Category):[^\[\]]*(?:\[\[[^\]]*\]\][^\[\]]*)*\]\]", re.I)
+_LINK = re.compile(r"\[\[(?:[^|\]]*\|)?([^\]]*)\]\]")
+_EXTERNAL_LINK = re.compile(r"\[https?://[^\s\]]+\s?([^\]]*)\]")
+
+
+def first_paragraph_from_wikitext(text):
+    """
+    Turns the start of an article's wikitext into its first plain-text
+    paragraph. This is a light clean-up (templates, references, links and
+    markup), not a full wikitext parser.
+    """
+    text = _COMMENT.sub("", text)
+    text = _REF.sub("", text)
+    # Nested templates are removed from the inside out
+    previous = None
+    while previous != text:
+        previous, text = text, _TEMPLATE.sub("", text)
+    text = _TABLE.sub("", text)
+    text = _FILE_LINK.sub("", text)
+    text = _LINK.sub(r"\1", text)
+    text = _EXTERNAL_LINK.sub(r"\1", text)
+    text = _TAG.sub("", text)
+    text = text.replace("'''", "").replace("''", "")
+    for paragraph in text.split("\n"):
+        paragraph = paragraph.strip()
+        # Skip headings, lists and leftovers such as "}}" or "|"
+        if len(paragraph) > 20 and paragraph[0] not in "=*#:;|!{}":
+            return " ".join(paragraph.split())
+    return None
+
+
+def iter_dump(path):
+    """
+    Streams a dump and yields one entry per article, without loading the file.
+
+    Yields:
+        tuple: ("page", title, first paragraph) or ("redirect", title, target title).
+    """
+    with _open_dump(path) as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+        fields = {}
+        for event, elem in context:
+            name = _local_name(elem.tag)
+            if event == "start":
+                if name == "redirect":
+                    fields["redirect"] = elem.get("title")
+                continue
+            if name in ("title", "ns", "text", "abstract"):
+                fields[name] = elem.text or ""
+            elif name == "page":
+                # Articles dump: only the main (article) namespace
+                if fields.get("ns", "0") == "0" and fields.get("title"):
+                    if fields.get("redirect"):
+                        yield "redirect", fields["title"], fields["redirect"]
+                    else:
+                        summary = first_paragraph_from_wikitext(fields.get("text", ""))
+                        if summary:
+                            yield "page", fields["title"], summary
+                fields = {}
+                root.clear()  # Drop the finished page so memory stays flat
+            elif name == "doc":
+                # Abstract dump: titles look like "Wikipedia: Kanpur"
+                title = fields.get("title", "")
+                if title.startswith("Wikipedia: "):
+                    title = title[len("Wikipedia: "):]
+                abstract = " ".join(fields.get("abstract", "").split())
+                if title and abstract:
+                    yield "page", title, abstract
+                fields = {}
+                root.clear()
+
+
+# --- The index ---
+
+class WikiIndex:
+    """
+    A SQLite index of article summaries. Exact and redirect lookups use the
+    primary keys; fuzzy lookups use an FTS5 trigram index on titles to find
+    candidates, then pick the closest one with difflib.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, title TEXT NOT NULL, summary TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS redirects (key TEXT PRIMARY KEY, target TEXT NOT NULL);
+            CREATE VIRTUAL TABLE IF NOT EXISTS titles_fts USING fts5(
+                key, content='pages', content_rowid='rowid', tokenize='trigram');
+        """)
+
+    def build(self, dump_path):
+        """
+        Adds every article and redirect from a dump to the index.
+
+        Returns:
+            tuple: (pages added, redirects added).
+        """
+        db = self._db
+        # Building is one-off: trade crash safety for speed
+        db.execute("PRAGMA journal_mode = OFF")
+        db.execute("PRAGMA synchronous = OFF")
+        pages, redirects = [], []
+        page_count = redirect_count = 0
+        start = time.perf_counter()
+
+        def flush():
+            db.executemany("INSERT OR IGNORE INTO pages VALUES (?, ?, ?)", pages)
+            db.executemany("INSERT OR IGNORE INTO redirects VALUES (?, ?)", redirects)
+            db.commit()
+            pages.clear()
+            redirects.clear()
+
+        for kind, title, value in iter_dump(dump_path):
+            if kind == "page":
+                pages.append((normalize_title(title), title, value))
+                page_count += 1
+            else:
+                redirects.append((normalize_title(title), normalize_title(value)))
+                redirect_count += 1
+            if len(pages) + len(redirects) >= BATCH_ROWS:
+                flush()
+                print(f"  {page_count} pages, {redirect_count} redirects "
+                      f"({time.perf_counter() - start:.0f}s)", end="\r")
+        flush()
+        # Build the title search index in one pass over the finished table
+        db.execute("INSERT INTO titles_fts(titles_fts) VALUES ('rebuild')")
+        db.commit()
+        db.execute("PRAGMA synchronous = FULL")
+        return page_count, redirect_count
+
+    def lookup(self, title, fuzzy=True):
+        """
+        Finds the summary for a title, following redirects.
+
+        Args:
+            title (str): The title to look up, in any case or spacing.
+            fuzzy (bool): On a miss, fall back to the closest similar title.
+
+        Returns:
+            tuple: (page title, summary), or None if nothing matches.
+        """
+        key = normalize_title(title)
+        for _ in range(MAX_REDIRECT_HOPS + 1):
+            row = self._db.execute("SELECT title, summary FROM pages WHERE key = ?", (key,)).fetchone()
+            if row:
+                return row
+            target = self._db.execute("SELECT target FROM redirects WHERE key = ?", (key,)).fetchone()
+            if not target:
+                break
+            key = target[0]
+        if fuzzy:
+            return self._fuzzy_lookup(normalize_title(title))
+        return None
+
+    def _fuzzy_lookup(self, key, candidates=50):
+        # Trigram search needs at least three characters
+        if len(key) < 3:
+            return None
+        # A title with at least MIN_TRIGRAM_SHARE of the query's trigrams misses
+        # at most `missing` of them, so it contains every trigram of at least one
+        # of `missing + 1` groups. ANDing within groups keeps FTS from ranking
+        # every title that merely shares one trigram with the query.
+        trigrams = list(dict.fromkeys(key[i:i + 3] for i in range(len(key) - 2)))
+        missing = len(trigrams) - math.ceil(MIN_TRIGRAM_SHARE * len(trigrams))
+        count = missing + 1
+        groups = [trigrams[i * len(trigrams) // count:(i + 1) * len(trigrams) // count]
+                  for i in range(count)]
+        match = " OR ".join(
+            "(" + " AND ".join('"' + t.replace('"', '""') + '"' for t in group) + ")"
+            for group in groups)
+        rows = self._db.execute(
+            "SELECT key FROM titles_fts WHERE titles_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, candidates)).fetchall()
+        best = difflib.get_close_matches(key, [r[0] for r in rows], n=1, cutoff=FUZZY_CUTOFF)
+        if not best:
+            return None
+        return self._db.execute("SELECT title, summary FROM pages WHERE key = ?", (best[0],)).fetchone()
+
+    def close(self):
+        self._db.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    dump_path = sys.argv[1]
+    index_path = sys.argv[2] if len(sys.argv) > 2 else INDEX_PATH
+    print(f"Building '{index_path}' from '{dump_path}'...")
+    index = WikiIndex(index_path)
+    try:
+        pages, redirects = index.build(dump_path)
+        print(f"\nDone: {pages} pages and {redirects} redirects indexed.")
+    finally:
+        index.close()
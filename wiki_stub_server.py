@@ -0,0 +1,121 @@
+# File: wiki_stub_server.py
+"""
+A local stand-in for the MediaWiki query API, for trying out
+information_finder.get_web_information_bulk without touching Wikipedia.
+
+It answers action=query&prop=extracts requests for a small set of pages,
+with title normalization, redirects, missing pages and the API's limit of
+20 extracts per response (followed with "continue"). Running this file
+looks up a topic list through it and shows how many requests were needed.
+"""
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from information_finder import get_web_information_bulk, WikiSummaryCache
+
+EXTRACTS_PER_RESPONSE = 20
+
+PAGES = {
+    "Kanpur": "Kanpur is a large city in Uttar Pradesh, India.\nIt lies on the Ganges.",
+    "Lucknow": "Lucknow is the capital of Uttar Pradesh.",
+    "Varanasi": "Varanasi is a city on the banks of the Ganges.",
+    "Black hole": "A black hole is a region of spacetime where gravity is so strong that nothing can escape.",
+    "Aryabhata": "Aryabhata was an Indian mathematician and astronomer.",
+}
+# Many more pages, so lookups span several requests
+PAGES.update({f"Star {i}": f"Star {i} is a star in the catalogue." for i in range(200)})
+REDIRECTS = {"Cawnpore": "Kanpur", "Benares": "Varanasi", "Kashi": "Varanasi"}
+
+
+def normalize(title):
+    """Mimics MediaWiki title normalization: underscores to spaces, first letter upper case."""
+    title = " ".join(title.replace("_", " ").split())
+    return title[:1].upper() + title[1:]
+
+
+class StubWikiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        with self.server.lock:
+            self.server.requests += 1
+
+        titles = params.get("titles", "").split("|")
+        normalized, redirects, pages = [], [], []
+        for title in titles:
+            norm = normalize(title)
+            if norm != title:
+                normalized.append({"fromencoded": False, "from": title, "to": norm})
+            if norm in REDIRECTS:
+                redirects.append({"from": norm, "to": REDIRECTS[norm]})
+                norm = REDIRECTS[norm]
+            pages.append(norm)
+
+        # Like the real API, only a limited number of extracts per response
+        offset = int(params.get("excontinue", 0))
+        found = [t for t in dict.fromkeys(pages) if t in PAGES]
+        with_extract = set(found[offset:offset + EXTRACTS_PER_RESPONSE])
+        body = {"batchcomplete": True, "query": {"normalized": normalized, "redirects": redirects, "pages": []}}
+        for title in dict.fromkeys(pages):
+            if title not in PAGES:
+                body["query"]["pages"].append({"ns": 0, "title": title, "missing": True})
+            elif title in with_extract:
+                body["query"]["pages"].append({"ns": 0, "title": title, "extract": PAGES[title]})
+            else:
+                body["query"]["pages"].append({"ns": 0, "title": title})
+        if offset + EXTRACTS_PER_RESPONSE < len(found):
+            body["continue"] = {"excontinue": offset + EXTRACTS_PER_RESPONSE, "continue": "||"}
+            del body["batchcomplete"]
+
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_stub_server():
+    """
+    Starts the stand-in API on a free local port in a background thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server; its url attribute is the
+        api.php endpoint. Call shutdown() when done.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubWikiHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/w/api.php"
+    threading.Thread(target=server.serve_forever, daemon=True, name="StubWikiServer").start()
+    return server
+
+
+if __name__ == "__main__":
+    server = start_stub_server()
+    topics = ["kanpur", "Cawnpore", "black_hole", "Benares", "Aryabhata", "No such page"]
+    topics += [f"Star {i}" for i in range(120)]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = WikiSummaryCache(os.path.join(tmp, "wiki_cache.sqlite3"))
+        try:
+            results = get_web_information_bulk(topics, cache=cache, api_url=server.url)
+            print(f"First run : {len(topics)} topics in {server.requests} requests")
+            for topic in topics[:6]:
+                print(f"  {topic!r}: {results[topic]}")
+
+            server.requests = 0
+            get_web_information_bulk(topics, cache=cache, api_url=server.url)
+            print(f"Second run: {len(topics)} topics in {server.requests} requests (served from cache)")
+        finally:
+            cache.close()
+            server.shutdown()